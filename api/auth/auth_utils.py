@@ -5,10 +5,15 @@ from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from bson import ObjectId
+from pymongo.errors import PyMongoError
 
 from ..models.user import TokenData, UserInDB
 from ..database import get_user_collection
 from ..config import settings
+from ..utils.cache import MISSING, TTLCache
+from ..utils.deadline import server_error
+from ..utils.timing import phase
+from .hashing import hash_pool
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -16,6 +21,19 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 # JWT Security
 security = HTTPBearer()
 
+# Authenticated users by email, so protected endpoints skip the per-request lookup.
+# Writes to a user evict it through its "user:<id>" tag.
+principal_cache = TTLCache(
+    "principals",
+    max_entries=settings.principal_cache_max_entries,
+    ttl_seconds=settings.principal_cache_ttl_seconds,
+    enabled=settings.principal_cache_enabled,
+)
+
+def invalidate_principal(user_id) -> None:
+    """Evict a user from the principal cache after it changed"""
+    principal_cache.invalidate_tag(f"user:{ObjectId(str(user_id))}")
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against a hashed password"""
     return pwd_context.verify(plain_password, hashed_password)
@@ -24,6 +42,14 @@ def get_password_hash(password: str) -> str:
     """Hash a password"""
     return pwd_context.hash(password)
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the hashing pool without blocking the event loop"""
+    return await hash_pool.run(pwd_context.verify, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the hashing pool without blocking the event loop"""
+    return await hash_pool.run(pwd_context.hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -46,7 +72,8 @@ async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(secur
     
     try:
         token = credentials.credentials
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+        with phase("jwt"):
+            payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
@@ -57,9 +84,12 @@ async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(secur
     return token_data
 
 async def get_user_by_email(email: str) -> Optional[UserInDB]:
-    """Get user by email from database"""
-    user_collection = await get_user_collection()
-    user_data = await user_collection.find_one({"email": email, "is_deleted": False})
+    """Get user by email from database; a lookup that runs out of time is a 504"""
+    try:
+        user_collection = await get_user_collection()
+        user_data = await user_collection.find_one({"email": email, "is_deleted": False})
+    except PyMongoError as error:
+        raise server_error(error)
     
     if user_data:
         user_data["id"] = str(user_data["_id"])
@@ -67,8 +97,14 @@ async def get_user_by_email(email: str) -> Optional[UserInDB]:
     return None
 
 async def get_current_user(token_data: TokenData = Depends(verify_token)) -> UserInDB:
-    """Get current authenticated user"""
-    user = await get_user_by_email(email=token_data.email)
+    """Get current authenticated user, served from the principal cache when possible"""
+    with phase("user"):
+        user = principal_cache.get(token_data.email)
+        if user is MISSING:
+            generation = principal_cache.generation
+            user = await get_user_by_email(email=token_data.email)
+            if user is not None:
+                principal_cache.set(token_data.email, user, tags=(f"user:{user.id}",), generation=generation)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -100,6 +136,6 @@ async def authenticate_user(email: str, password: str) -> Optional[UserInDB]:
     user = await get_user_by_email(email)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    if not await verify_password_async(password, user.hashed_password):
         return None
     return user
@@ -0,0 +1,110 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+from fastapi import HTTPException, status
+
+from ..config import settings
+from ..utils.deadline import remaining_seconds
+from ..utils.metrics import registry
+from ..utils.timing import record
+
+T = TypeVar("T")
+
+HASH_SECONDS = registry.histogram(
+    "password_hash_duration_seconds",
+    "Time spent running bcrypt on the hashing pool",
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0),
+)
+
+
+class PasswordHashPool:
+    """Runs bcrypt on a bounded thread pool so it never blocks the event loop.
+
+    bcrypt releases the GIL while hashing, so threads give real parallelism.
+    At most `max_workers` hashes run at once; further callers wait in an
+    asyncio queue, and once `max_pending` are waiting new ones are rejected
+    with 503 instead of piling up behind a login burst. A caller whose
+    request deadline passes while queued is rejected the same way.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.in_flight = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+        self.total_wait_seconds = 0.0
+
+    def _ensure_started(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="bcrypt"
+            )
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+
+    def _reject(self, detail: str) -> HTTPException:
+        self.rejected += 1
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail,
+            headers={"Retry-After": "1"},
+        )
+
+    async def run(self, fn: Callable[..., T], *args) -> T:
+        """Run a blocking hash function in the pool"""
+        self._ensure_started()
+        if self.waiting >= self.max_pending:
+            raise self._reject("Too many concurrent authentication requests")
+
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=remaining_seconds())
+        except asyncio.TimeoutError:
+            raise self._reject("Request deadline exceeded while waiting to hash")
+        finally:
+            self.waiting -= 1
+
+        started_at = time.perf_counter()
+        self.total_wait_seconds += started_at - queued_at
+        record("bcrypt-wait", started_at - queued_at)
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, fn, *args)
+        finally:
+            elapsed = time.perf_counter() - started_at
+            self.in_flight -= 1
+            self.completed += 1
+            self.total_seconds += elapsed
+            HASH_SECONDS.observe(elapsed)
+            record("bcrypt", elapsed)
+            self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "max_waiting": self.max_waiting,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_hash_ms": round(self.total_seconds * 1000 / self.completed, 2) if self.completed else 0.0,
+            "avg_wait_ms": round(self.total_wait_seconds * 1000 / self.completed, 2) if self.completed else 0.0,
+        }
+
+
+hash_pool = PasswordHashPool(
+    max_workers=settings.password_hash_workers,
+    max_pending=settings.password_hash_max_pending,
+)
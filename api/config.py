@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings
-from pydantic import ConfigDict
-from typing import Optional
+from pydantic import ConfigDict, model_validator
+from typing import Literal, Optional
 
 
 class Settings(BaseSettings):
@@ -13,6 +13,20 @@ class Settings(BaseSettings):
     # MongoDB
     mongodb_connect_uri: str
     database_name: str = "ultimate_library"
+    ensure_indexes_on_connect: bool = False
+    mongo_warmup_on_startup: bool = True
+    
+    # MongoDB connection profile and optional per-option overrides
+    mongo_profile: Literal["serverless", "single-worker", "multi-worker"] = "serverless"
+    mongo_max_pool_size: Optional[int] = None
+    mongo_min_pool_size: Optional[int] = None
+    mongo_max_idle_time_ms: Optional[int] = None
+    mongo_server_selection_timeout_ms: Optional[int] = None
+    mongo_connect_timeout_ms: Optional[int] = None
+    mongo_socket_timeout_ms: Optional[int] = None
+    mongo_wait_queue_timeout_ms: Optional[int] = None
+    mongo_compressors: Optional[str] = None  # comma-separated, e.g. "zstd,snappy"; "none" disables
+    mongo_read_preference: Optional[str] = None
     
     # JWT Configuration
     secret_key: str
@@ -25,8 +39,78 @@ class Settings(BaseSettings):
     version: str = "1.0.0"
     description: str = "A FastAPI application for managing books and users"
     
+    # Book read cache (per process; unset means on only with the single-worker profile)
+    book_cache_enabled: Optional[bool] = None
+    book_cache_ttl_seconds: float = 30.0
+    book_cache_max_entries: int = 1024
+    book_cache_max_bytes: int = 32 * 1024 * 1024
+    
+    # Transcode book reads from raw BSON to JSON without decoding them to dicts
+    raw_bson_reads: bool = False
+    
+    # Bulk book endpoints: maximum items per request
+    bulk_max_items: int = 1000
+    
+    # Authenticated-principal cache (per process; unset means on only with the single-worker profile)
+    principal_cache_enabled: Optional[bool] = None
+    principal_cache_ttl_seconds: float = 10.0
+    principal_cache_max_entries: int = 4096
+    
+    # Password hashing pool (bcrypt runs off the event loop)
+    password_hash_workers: int = 4
+    password_hash_max_pending: int = 256
+    
+    # MongoDB commands slower than this are logged with their filter shape and plan (0 disables)
+    slow_query_ms: int = 200
+    slow_query_explain: bool = True
+    slow_query_explain_interval_seconds: float = 60.0
+    
+    # Prometheus metrics at /metrics; with a token, scrapers send "Authorization: Bearer <token>"
+    metrics_enabled: bool = True
+    metrics_token: Optional[str] = None
+    # Directory where worker processes share metric snapshots (unset: this process only)
+    metrics_dir: Optional[str] = None
+    metrics_flush_interval_seconds: float = 5.0
+    
+    # Server-Timing header with per-phase durations; optionally one log line per request
+    server_timing_enabled: bool = True
+    server_timing_log: bool = False
+    
+    # On-demand profiling: admins send "X-Profile: 1"; a sample rate profiles random requests too
+    profiling_enabled: bool = True
+    profile_sample_rate: float = 0.0
+    profile_dir: Optional[str] = None
+    profile_max_files: int = 50
+    
+    # Readiness probe: ping timeout, how long a ping result is reused, and when to report not ready
+    health_ping_timeout_ms: int = 1000
+    health_ping_cache_seconds: float = 2.0
+    health_max_loop_lag_ms: float = 250.0
+    health_max_pool_waiting: int = 10
+    
+    # Request time budget in ms, passed to MongoDB as maxTimeMS (0 disables)
+    request_timeout_ms: int = 10000
+    
+    # Response compression (zstd/brotli need their packages installed)
+    compression_enabled: bool = True
+    compression_minimum_size: int = 1024
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+    compression_zstd_level: int = 3
+    
     # Environment
     environment: str = "development"
     port: int = 8000
+    
+    @model_validator(mode="after")
+    def default_process_caches(self):
+        # Per-process caches only see this process's writes; with several workers
+        # or instances, another one could serve stale books or a revoked user
+        single_process = self.mongo_profile == "single-worker"
+        if self.book_cache_enabled is None:
+            self.book_cache_enabled = single_process
+        if self.principal_cache_enabled is None:
+            self.principal_cache_enabled = single_process
+        return self
 
 settings = Settings()
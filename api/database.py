@@ -1,17 +1,91 @@
+import asyncio
+import contextvars
 import motor.motor_asyncio
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo.compression_support import validate_compressors
 from typing import Optional
 import logging
+import warnings
 from .config import settings
+from .indexes import ensure_indexes
+from .monitoring import command_monitor
+from .utils.mongo_pool import pool_monitor
 
 logger = logging.getLogger(__name__)
 
 class Database:
     client: Optional[AsyncIOMotorClient] = None
     database: Optional[AsyncIOMotorDatabase] = None
+    connecting: Optional[asyncio.Task] = None  # the one connection attempt in flight
 
 db = Database()
 
+# Driver options per deployment. Serverless instances serve one request at a
+# time and are frozen between invocations, so they keep few, short-lived
+# sockets; long-lived workers keep a warm pool sized for their concurrency.
+# Every worker process has its own pool, so multi-worker pools are smaller.
+CONNECTION_PROFILES = {
+    "serverless": {
+        "maxPoolSize": 2,  # a listing runs its find and count side by side
+        "minPoolSize": 0,
+        "maxIdleTimeMS": 30000,
+        "serverSelectionTimeoutMS": 5000,
+        "connectTimeoutMS": 10000,
+        "socketTimeoutMS": 20000,
+        "waitQueueTimeoutMS": 5000,
+        "compressors": "zstd,snappy,zlib",
+        "readPreference": "primaryPreferred",
+    },
+    "single-worker": {
+        "maxPoolSize": 50,
+        "minPoolSize": 5,
+        "maxIdleTimeMS": 300000,
+        "serverSelectionTimeoutMS": 10000,
+        "connectTimeoutMS": 5000,
+        "socketTimeoutMS": 30000,
+        "waitQueueTimeoutMS": 2000,
+        "compressors": "zstd,snappy,zlib",
+        "readPreference": "primary",
+    },
+    "multi-worker": {
+        "maxPoolSize": 20,
+        "minPoolSize": 2,
+        "maxIdleTimeMS": 300000,
+        "serverSelectionTimeoutMS": 10000,
+        "connectTimeoutMS": 5000,
+        "socketTimeoutMS": 30000,
+        "waitQueueTimeoutMS": 2000,
+        "compressors": "zstd,snappy,zlib",
+        "readPreference": "primaryPreferred",
+    },
+}
+
+def client_options() -> dict:
+    """Driver options of the configured profile with the MONGO_* overrides applied"""
+    options = dict(CONNECTION_PROFILES[settings.mongo_profile])
+    overrides = {
+        "maxPoolSize": settings.mongo_max_pool_size,
+        "minPoolSize": settings.mongo_min_pool_size,
+        "maxIdleTimeMS": settings.mongo_max_idle_time_ms,
+        "serverSelectionTimeoutMS": settings.mongo_server_selection_timeout_ms,
+        "connectTimeoutMS": settings.mongo_connect_timeout_ms,
+        "socketTimeoutMS": settings.mongo_socket_timeout_ms,
+        "waitQueueTimeoutMS": settings.mongo_wait_queue_timeout_ms,
+        "compressors": settings.mongo_compressors,
+        "readPreference": settings.mongo_read_preference,
+    }
+    options.update({name: value for name, value in overrides.items() if value is not None})
+    
+    # Offer only the compressors whose libraries are installed; the server picks one
+    compressors = options.pop("compressors")
+    if compressors and compressors.lower() != "none":
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            available = validate_compressors(None, compressors)
+        if available:
+            options["compressors"] = available
+    return options
+
 async def get_database() -> AsyncIOMotorDatabase:
     """Get database connection with lazy initialization for Vercel"""
     if db.database is None:
@@ -19,40 +93,74 @@ async def get_database() -> AsyncIOMotorDatabase:
     return db.database
 
 async def connect_to_mongo():
-    """Create database connection"""
+    """Create database connection.
+
+    Single-flight: concurrent callers on a cold instance all await the same
+    attempt instead of each building a client and pinging. A failed attempt
+    is forgotten so the next call retries.
+    """
     if db.client is not None:
         return  # Already connected
-        
+    
+    if db.connecting is None:
+        # Started from an empty context so the first caller's deadline does not bound it
+        db.connecting = contextvars.Context().run(asyncio.ensure_future, _connect())
+    attempt = db.connecting
+    try:
+        # A cancelled caller must not cancel the attempt the others await
+        await asyncio.shield(attempt)
+    finally:
+        if attempt.done() and db.connecting is attempt:
+            db.connecting = None
+
+async def _connect():
+    client = None
     try:
         mongodb_url = settings.mongodb_connect_uri
         if not mongodb_url:
             raise ValueError("MONGODB_CONNECT_URI environment variable is not set")
         
-        # Optimized settings for serverless environment
-        db.client = motor.motor_asyncio.AsyncIOMotorClient(
+        # Pool, timeouts and compression come from the deployment profile
+        client = motor.motor_asyncio.AsyncIOMotorClient(
             mongodb_url,
-            maxPoolSize=1,  # Reduced for serverless
-            minPoolSize=0,  # Start with 0 connections
-            maxIdleTimeMS=30000,  # Close idle connections faster
-            serverSelectionTimeoutMS=5000,
-            connectTimeoutMS=10000,
+            event_listeners=[pool_monitor, command_monitor],
+            **client_options()
         )
         
         # Get database name from settings
-        database_name = settings.database_name
-        db.database = db.client[database_name]
+        database = client[settings.database_name]
         
         # Test the connection
-        await db.client.admin.command('ping')
+        await client.admin.command('ping')
         logger.info("Connected to MongoDB successfully")
         
+        # Make sure the indexes the queries rely on exist
+        if settings.ensure_indexes_on_connect:
+            await ensure_indexes(database)
+        
+        # Publish only a client that is known to work
+        db.client = client
+        db.database = database
+        command_monitor.bind(client)
+        
     except Exception as e:
         logger.error(f"Could not connect to MongoDB: {e}")
+        if client is not None:
+            client.close()
         raise
 
+async def warm_up():
+    """Connect before the first request so a cold burst does not wait on it"""
+    try:
+        await connect_to_mongo()
+    except Exception:
+        # Requests retry lazily; a failed warmup must not stop the app starting
+        logger.warning("MongoDB warmup failed; connecting on first request instead")
+
 async def close_mongo_connection():
     """Close database connection"""
     if db.client:
+        command_monitor.bind(None)
         db.client.close()
         db.client = None
         db.database = None
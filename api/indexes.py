@@ -0,0 +1,110 @@
+from typing import Dict, List
+import logging
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, TEXT, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+# Fields accepted by the `order_by` parameter of each listing endpoint
+BOOK_SORT_FIELDS = ["name", "author", "price", "created_at", "updated_at"]
+USER_SORT_FIELDS = ["name", "lastname", "email", "created_at", "updated_at"]
+
+
+def _book_indexes() -> List[IndexModel]:
+    # Listings sort on (order_by, _id); the index serves both directions
+    indexes = [
+        IndexModel([(field, ASCENDING), ("_id", ASCENDING)], name=f"sort_{field}")
+        for field in BOOK_SORT_FIELDS
+    ]
+    # Keyword search: relevance-ranked words and anchored token prefixes
+    indexes += [
+        IndexModel(
+            [("name", TEXT), ("author", TEXT), ("description", TEXT)],
+            name="search_text",
+            weights={"name": 10, "author": 5, "description": 1},
+            default_language="none",
+        ),
+        IndexModel([("search_tokens", ASCENDING)], name="search_tokens"),
+    ]
+    # Natural key matched by catalog imports in upsert mode
+    indexes.append(IndexModel([("name", ASCENDING), ("author", ASCENDING)], name="natural_key"))
+    return indexes
+
+
+def _user_indexes() -> List[IndexModel]:
+    indexes = [
+        # Login and every authenticated request look users up by active email
+        IndexModel(
+            [("email", ASCENDING)],
+            name="email_active_unique",
+            unique=True,
+            partialFilterExpression={"is_deleted": False},
+        ),
+    ]
+    # Listings always filter on is_deleted before sorting
+    indexes += [
+        IndexModel(
+            [("is_deleted", ASCENDING), (field, ASCENDING), ("_id", ASCENDING)],
+            name=f"sort_{field}",
+        )
+        for field in USER_SORT_FIELDS
+    ]
+    return indexes
+
+
+# Indexes declared per collection
+INDEXES: Dict[str, List[IndexModel]] = {
+    "books": _book_indexes(),
+    "users": _user_indexes(),
+}
+
+
+async def ensure_indexes(database: AsyncIOMotorDatabase) -> Dict[str, List[str]]:
+    """Create every declared index; existing identical indexes are left as they are.
+
+    Unique indexes can fail on existing data (e.g. duplicate active emails), so
+    each gets its own createIndexes command and cannot block the others.
+    """
+    created = {}
+    for collection_name, indexes in INDEXES.items():
+        collection = database[collection_name]
+        batches = [[index] for index in indexes if index.document.get("unique")]
+        batches.append([index for index in indexes if not index.document.get("unique")])
+        created[collection_name] = []
+        for batch in batches:
+            try:
+                created[collection_name] += await collection.create_indexes(batch)
+            except OperationFailure as error:
+                names = ", ".join(index.document["name"] for index in batch)
+                logger.error(f"Could not create {names} on {collection_name}: {error}")
+    return created
+
+
+async def index_report(database: AsyncIOMotorDatabase) -> Dict[str, dict]:
+    """Report declared indexes that are missing and existing ones never used since restart"""
+    report = {}
+    for collection_name, indexes in INDEXES.items():
+        collection = database[collection_name]
+        declared = {index.document["name"] for index in indexes}
+
+        existing = set()
+        async for index in collection.list_indexes():
+            existing.add(index["name"])
+
+        unused = []
+        try:
+            async for stats in collection.aggregate([{"$indexStats": {}}]):
+                if stats["name"] != "_id_" and stats["accesses"]["ops"] == 0:
+                    unused.append(stats["name"])
+        except OperationFailure as error:
+            # $indexStats needs the clusterMonitor role on some deployments
+            logger.warning(f"Could not read index stats for {collection_name}: {error}")
+
+        report[collection_name] = {
+            "missing": sorted(declared - existing),
+            "undeclared": sorted(existing - declared - {"_id_"}),
+            "unused": sorted(unused),
+        }
+    return report
@@ -1,28 +1,82 @@
+import asyncio
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 import logging
 
 # Import configurations and database
 from .config import settings
-from .database import get_database
+from .database import get_database, warm_up, close_mongo_connection
+from .middleware.compression import CompressionMiddleware
+from .middleware.deadline import DeadlineMiddleware
+from .middleware.metrics import MetricsMiddleware
+from .middleware.profiling import ProfilingMiddleware
+from .middleware.route_context import RouteContextMiddleware
+from .middleware.server_timing import ServerTimingMiddleware
 
 # Import routers
-from .routers import books, users
+from .routers import admin, books, health, metrics, users
+from .profiles import profile_store
+from .utils.loop_lag import loop_monitor
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Create FastAPI application without lifespan for Vercel compatibility
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Eager MongoDB warmup, event loop lag sampling and metrics snapshots for long-lived servers"""
+    if settings.mongo_warmup_on_startup:
+        await warm_up()
+    loop_monitor.start()
+    flusher = None
+    if settings.metrics_enabled and metrics.store is not None:
+        flusher = asyncio.create_task(metrics.flush_periodically())
+    yield
+    loop_monitor.stop()
+    if flusher is not None:
+        flusher.cancel()
+        metrics.flush()
+    await close_mongo_connection()
+
+# The lifespan only runs under uvicorn; Mangum keeps it off for Vercel, where
+# the first request connects lazily
 app = FastAPI(
     title=settings.project_name,
     version=settings.version,
     description=settings.description,
     docs_url="/docs" if settings.environment == "development" else None,
     redoc_url="/redoc" if settings.environment == "development" else None,
+    lifespan=lifespan,
 )
 
+# Profile single requests on demand; innermost, so the profile is the handler's
+if settings.profiling_enabled:
+    app.add_middleware(
+        ProfilingMiddleware,
+        store=profile_store,
+        sample_rate=settings.profile_sample_rate,
+    )
+
+# Attribute MongoDB commands to the route that sent them
+app.add_middleware(RouteContextMiddleware)
+
+# Break each request's time down by phase in a Server-Timing header
+if settings.server_timing_enabled:
+    app.add_middleware(ServerTimingMiddleware, log=settings.server_timing_log)
+
+# Give each request a time budget; streaming import/export run without one
+if settings.request_timeout_ms > 0:
+    app.add_middleware(
+        DeadlineMiddleware,
+        timeout_ms=settings.request_timeout_ms,
+        exempt_paths=(
+            f"{settings.api_v1_prefix}/books/import",
+            f"{settings.api_v1_prefix}/books/export",
+        ),
+    )
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -34,10 +88,25 @@ app.add_middleware(
         "https://your-frontend-domain.vercel.app",  # Add your frontend domain
     ],
     allow_credentials=True,
-    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+    allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Server-Timing", "X-Profile-Id"],
 )
 
+# Compress responses; wraps everything but the request metrics
+if settings.compression_enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_minimum_size,
+        gzip_level=settings.compression_gzip_level,
+        brotli_quality=settings.compression_brotli_quality,
+        zstd_level=settings.compression_zstd_level,
+    )
+
+# Request latency and status per route, compression included; added last
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+
 # Health check endpoint
 @app.get("/")
 async def root():
@@ -48,6 +117,7 @@ async def root():
         "status": "healthy"
     }
 
+# Kept for existing checks; /health/live and /health/ready are in api/routers/health.py
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "version": settings.version}
@@ -65,6 +135,20 @@ app.include_router(
     tags=["Users & Authentication"]
 )
 
+app.include_router(
+    admin.router,
+    prefix=settings.api_v1_prefix,
+    tags=["Admin"]
+)
+
+app.include_router(
+    health.router,
+    tags=["Health"]
+)
+
+if settings.metrics_enabled:
+    app.include_router(metrics.router)
+
 # Global exception handler
 @app.exception_handler(500)
 async def internal_server_error_handler(request, exc):
@@ -0,0 +1,38 @@
+from typing import Iterable
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from ..utils.deadline import request_deadline
+
+TIMEOUT_HEADER = "x-request-timeout-ms"
+
+
+class DeadlineMiddleware:
+    """Gives every request a time budget that MongoDB calls inherit.
+
+    The budget is `timeout_ms`; a client may ask for less through the
+    X-Request-Timeout-Ms header, never for more. Paths in `exempt_paths`
+    (long streaming imports and exports) run without a deadline.
+    """
+
+    def __init__(self, app: ASGIApp, timeout_ms: int, exempt_paths: Iterable[str] = ()):
+        self.app = app
+        self.timeout_ms = timeout_ms
+        self.exempt_paths = tuple(exempt_paths)
+
+    def _budget_ms(self, scope: Scope) -> int:
+        requested = Headers(scope=scope).get(TIMEOUT_HEADER)
+        if requested:
+            try:
+                return max(1, min(self.timeout_ms, int(requested)))
+            except ValueError:
+                pass
+        return self.timeout_ms
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+        with request_deadline(self._budget_ms(scope) / 1000):
+            await self.app(scope, receive, send)
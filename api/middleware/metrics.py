@@ -0,0 +1,51 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..monitoring import route_template
+from ..utils.metrics import registry
+
+REQUEST_SECONDS = registry.histogram(
+    "http_request_duration_seconds",
+    "Time from receiving a request to sending the last byte of its response",
+    ("method", "route", "status"),
+)
+IN_PROGRESS = registry.gauge(
+    "http_requests_in_progress",
+    "Requests currently being handled",
+    ("method",),
+)
+
+
+class MetricsMiddleware:
+    """Records latency and status of every request, labelled by route template"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500  # what the client gets if the app raises before responding
+        started = time.perf_counter()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        IN_PROGRESS.inc(method=method)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            IN_PROGRESS.dec(method=method)
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                method=method,
+                route=route_template(scope),
+                status=status_code,
+            )
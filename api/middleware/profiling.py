@@ -0,0 +1,95 @@
+import cProfile
+import logging
+import random
+import time
+
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..auth.auth_utils import get_current_user, verify_token
+from ..monitoring import route_template
+from ..utils.profiling import ProfileStore
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-profile"
+
+
+class ProfilingMiddleware:
+    """Runs cProfile around a request when an admin asks for it, or at random.
+
+    An admin sends `X-Profile: 1` with their bearer token; `sample_rate`
+    additionally profiles that fraction of all requests. The profile is
+    stored in `store` and its id returned in `X-Profile-Id`. Other requests
+    only pay for a header lookup (and a random draw when sampling is on).
+
+    cProfile sees the whole event loop thread, so requests running
+    concurrently show up in the profile too; only one profile runs at a time.
+    """
+
+    def __init__(self, app: ASGIApp, store: ProfileStore, sample_rate: float = 0.0):
+        self.app = app
+        self.store = store
+        self.sample_rate = sample_rate
+        self.active = False
+
+    async def _requested_by_admin(self, headers: Headers) -> bool:
+        scheme, _, token = headers.get("authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return False
+        try:
+            token_data = await verify_token(HTTPAuthorizationCredentials(scheme=scheme, credentials=token))
+            user = await get_current_user(token_data)
+        except HTTPException:
+            return False
+        return user.is_active and user.role == "admin"
+
+    async def _trigger(self, scope: Scope):
+        headers = Headers(scope=scope)
+        if headers.get(PROFILE_HEADER) in ("1", "true") and await self._requested_by_admin(headers):
+            return "admin"
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "sample"
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self.active:
+            await self.app(scope, receive, send)
+            return
+        trigger = await self._trigger(scope)
+        if trigger is None or self.active:
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = self.store.new_id()
+        status_code = None
+
+        async def send_with_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message).append("X-Profile-Id", profile_id)
+            await send(message)
+
+        self.active = True
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profiler.disable()
+            self.active = False
+            try:
+                self.store.save(profile_id, profiler, {
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "route": route_template(scope),
+                    "status": status_code,
+                    "trigger": trigger,
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                })
+            except OSError as error:
+                logger.warning(f"Could not store profile {profile_id}: {error}")
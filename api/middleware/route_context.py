@@ -0,0 +1,24 @@
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from ..monitoring import reset_request_scope, set_request_scope
+
+
+class RouteContextMiddleware:
+    """Makes the request's scope visible to MongoDB command monitoring.
+
+    Routing fills in `scope["route"]` later on the same scope, so commands
+    sent while handling the request are attributed to its route template.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = set_request_scope(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            reset_request_scope(token)
@@ -0,0 +1,56 @@
+import logging
+import time
+
+import orjson
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..monitoring import route_template
+from ..utils.timing import current_timing, start_timing, stop_timing
+
+logger = logging.getLogger(__name__)
+
+
+class ServerTimingMiddleware:
+    """Reports where a request spent its time in a Server-Timing header.
+
+    Phases are recorded through `api.utils.timing.phase` (JWT decoding, user
+    lookup, find, count, serialization, bcrypt...). The header is written
+    when the response starts, plus a `total`; with `log` each request also
+    gets one structured log line with its phases.
+    """
+
+    def __init__(self, app: ASGIApp, log: bool = False):
+        self.app = app
+        self.log = log
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = start_timing()
+        timing = current_timing()
+        started = time.perf_counter()
+        status_code = None
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", timing.header((time.perf_counter() - started) * 1000))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            stop_timing(token)
+            if self.log:
+                logger.info(orjson.dumps({
+                    "method": scope["method"],
+                    "route": route_template(scope),
+                    "status": status_code,
+                    "total_ms": round((time.perf_counter() - started) * 1000, 3),
+                    "phases": timing.as_dict(),
+                }).decode())
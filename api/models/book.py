@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional, Annotated
+from typing import Optional, Annotated, List
 from pydantic import BaseModel, Field, ConfigDict
 from pydantic.json_schema import JsonSchemaValue
 from pydantic_core import CoreSchema, core_schema
@@ -50,6 +50,10 @@ class BookUpdate(BaseModel):
     description: Optional[str] = Field(None, max_length=1000)
 
 
+class BookBulkDelete(BaseModel):
+    ids: List[str] = Field(..., min_length=1)
+
+
 class Book(BookBase):
     model_config = ConfigDict(
         populate_by_name=True,
@@ -0,0 +1,279 @@
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Optional
+
+import orjson
+import pymongo
+from pymongo import monitoring
+
+from .config import settings
+from .utils.metrics import bucket_quantile, registry
+
+logger = logging.getLogger(__name__)
+
+# Command latency bucket upper bounds in seconds, finer than request latencies
+COMMAND_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+COMMAND_SECONDS = registry.histogram(
+    "mongo_command_duration_seconds",
+    "MongoDB command latency by route and command",
+    ("route", "command"),
+    buckets=COMMAND_BUCKETS,
+)
+COMMAND_FAILURES = registry.counter(
+    "mongo_command_failures_total",
+    "MongoDB commands that failed",
+    ("route", "command"),
+)
+
+# Commands whose filter shape and plan are reported when they run slow
+EXPLAINABLE_COMMANDS = {"find", "count", "aggregate", "distinct", "findAndModify", "update", "delete"}
+
+# Slow commands kept for /admin/mongo-commands
+RECENT_SLOW = 50
+
+# Budget for the explain of a slow command
+EXPLAIN_TIMEOUT_SECONDS = 5
+
+# ASGI scope of the request being handled. Motor copies context variables
+# into its executor threads, so driver events can see which route sent them.
+_request_scope: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar("request_scope", default=None)
+
+
+def set_request_scope(scope: Optional[dict]) -> contextvars.Token:
+    return _request_scope.set(scope)
+
+
+def reset_request_scope(token: contextvars.Token):
+    _request_scope.reset(token)
+
+
+def route_template(scope: dict) -> str:
+    """Path template the request matched, e.g. `/api/v1/books/{book_id}`"""
+    # The template, not the raw path, keeps the number of labels bounded
+    template = getattr(scope.get("route"), "path", None)
+    if template is None:
+        return "unmatched"
+    # Depending on the FastAPI version the route may not carry its router's
+    # prefix; the prefix is whatever precedes the template's segments
+    segments = template.count("/")
+    prefix = "/".join(scope.get("path", "").split("/")[:-segments]) if segments else ""
+    return prefix + template
+
+
+def current_route() -> str:
+    """Method and path template of the current request, e.g. `GET /api/v1/books/{book_id}`"""
+    scope = _request_scope.get()
+    if scope is None:
+        return "background"
+    return f"{scope.get('method', '')} {route_template(scope)}"
+
+
+def filter_shape(value: Any) -> Any:
+    """A filter with its values replaced by `?`, keeping fields and operators"""
+    if isinstance(value, dict):
+        return {key: filter_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        shapes = []
+        for item in value:
+            shape = filter_shape(item)
+            if shape not in shapes:
+                shapes.append(shape)
+        return shapes
+    return "?"
+
+
+def command_filter(name: str, command: dict) -> Any:
+    """The query part of a command, wherever that command keeps it"""
+    if name == "find":
+        return command.get("filter", {})
+    if name in ("count", "distinct", "findAndModify"):
+        return command.get("query", {})
+    if name in ("update", "delete"):
+        statements = command.get("updates" if name == "update" else "deletes") or [{}]
+        return statements[0].get("q", {})
+    if name == "aggregate":
+        pipeline = command.get("pipeline") or [{}]
+        return pipeline[0].get("$match", {})
+    return {}
+
+
+def _explainable(name: str, command: dict) -> dict:
+    # Session, cluster time and deadline fields are re-added by the driver;
+    # explain only takes a single update/delete statement
+    spec = {
+        key: value for key, value in command.items()
+        if not key.startswith("$") and key not in ("lsid", "txnNumber", "maxTimeMS", "writeConcern", "readConcern")
+    }
+    if name in ("update", "delete"):
+        key = "updates" if name == "update" else "deletes"
+        spec[key] = list(spec.get(key) or [])[:1]
+    return spec
+
+
+def plan_summary(explain: dict) -> str:
+    """Winning plan as its stages, outermost first, e.g. `FETCH <- IXSCAN(title_1)`"""
+    planner = explain.get("queryPlanner")
+    if planner is None:
+        # Aggregations report the plan of their first ($cursor) stage
+        for stage in explain.get("stages", []):
+            if "$cursor" in stage:
+                planner = stage["$cursor"].get("queryPlanner")
+                break
+    plan = (planner or {}).get("winningPlan", {})
+    plan = plan.get("queryPlan", plan)
+    stages = []
+    while plan:
+        index = plan.get("indexName")
+        stages.append(f"{plan.get('stage')}({index})" if index else str(plan.get("stage")))
+        plan = plan.get("inputStage") or (plan.get("inputStages") or [None])[0]
+    return " <- ".join(stages) or "unknown"
+
+
+class CommandMonitor(monitoring.CommandListener):
+    """Per-route, per-command latency and failures, and a slow command log.
+
+    Latencies go to the mongo_command_* metrics of the registry, which also
+    back the summary served by /admin/mongo-commands.
+
+    Commands slower than SLOW_QUERY_MS are logged with their filter shape.
+    For find, count, aggregate, findAndModify, update and friends the plan
+    is then fetched with `explain` (queryPlanner verbosity, so nothing runs
+    again) on the event loop, at most once per command shape per
+    SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS, and logged as a summary.
+    """
+
+    def __init__(self, slow_ms: float, explain: bool = True, explain_interval: float = 60.0):
+        self.slow_ms = slow_ms
+        self.explain = explain
+        self.explain_interval = explain_interval
+        self._lock = threading.Lock()
+        self._client = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._explain_tasks = set()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.slow = 0
+            self.recent_slow = deque(maxlen=RECENT_SLOW)
+            self._pending = {}
+            self._explained = {}
+
+    def bind(self, client):
+        """Client and event loop used to explain slow commands (None to stop)"""
+        self._client = client
+        self._loop = asyncio.get_running_loop() if client is not None else None
+
+    def _key(self, event) -> tuple:
+        return (event.connection_id, event.request_id)
+
+    def started(self, event):
+        if event.command_name in EXPLAINABLE_COMMANDS and self.slow_ms > 0:
+            with self._lock:
+                self._pending[self._key(event)] = (event.command, event.database_name)
+
+    def _record(self, event, failed: bool):
+        elapsed_ms = event.duration_micros / 1000
+        route = current_route()
+        COMMAND_SECONDS.observe(elapsed_ms / 1000, route=route, command=event.command_name)
+        if failed:
+            COMMAND_FAILURES.inc(route=route, command=event.command_name)
+        with self._lock:
+            pending = self._pending.pop(self._key(event), None)
+        if pending is not None and elapsed_ms >= self.slow_ms:
+            self._slow(event, route, elapsed_ms, *pending)
+
+    def succeeded(self, event):
+        self._record(event, failed=False)
+
+    def failed(self, event):
+        self._record(event, failed=True)
+
+    def _slow(self, event, route: str, elapsed_ms: float, command: dict, database_name: str):
+        name = event.command_name
+        collection = command.get(name)
+        shape = orjson.dumps(filter_shape(command_filter(name, command)), default=str).decode()
+        entry = {
+            "route": route,
+            "command": name,
+            "collection": collection,
+            "filter": shape,
+            "duration_ms": round(elapsed_ms, 3),
+            "plan": None,
+        }
+        logger.warning(
+            "Slow MongoDB %s on %s took %.1f ms (%s) filter=%s",
+            name, collection, elapsed_ms, route, shape,
+        )
+
+        now = time.monotonic()
+        explain_key = (database_name, collection, name, shape)
+        with self._lock:
+            self.slow += 1
+            self.recent_slow.append(entry)
+            due = now - self._explained.get(explain_key, float("-inf")) >= self.explain_interval
+            if due:
+                if len(self._explained) >= 1024:
+                    self._explained.clear()
+                self._explained[explain_key] = now
+
+        loop = self._loop
+        if self.explain and due and loop is not None and not loop.is_closed():
+            # A fresh context: the explain must not inherit the request's deadline
+            loop.call_soon_threadsafe(
+                self._start_explain, entry, database_name, _explainable(name, command),
+                context=contextvars.Context(),
+            )
+
+    def _start_explain(self, entry: dict, database_name: str, command: dict):
+        task = asyncio.ensure_future(self._explain(entry, database_name, command))
+        self._explain_tasks.add(task)
+        task.add_done_callback(self._explain_tasks.discard)
+
+    async def _explain(self, entry: dict, database_name: str, command: dict):
+        client = self._client
+        if client is None:
+            return
+        try:
+            with pymongo.timeout(EXPLAIN_TIMEOUT_SECONDS):
+                result = await client[database_name].command({"explain": command, "verbosity": "queryPlanner"})
+        except Exception as error:
+            logger.info(f"Could not explain slow {entry['command']} on {entry['collection']}: {error}")
+            return
+        entry["plan"] = plan_summary(result)
+        logger.warning(
+            "Plan of slow MongoDB %s on %s filter=%s: %s",
+            entry["command"], entry["collection"], entry["filter"], entry["plan"],
+        )
+
+    def stats(self) -> dict:
+        failures = COMMAND_FAILURES.values()
+        routes = {}
+        for (route, name), (counts, total) in sorted(COMMAND_SECONDS.values().items()):
+            count = sum(counts)
+            routes.setdefault(route, {})[name] = {
+                "count": count,
+                "avg_ms": round(total * 1000 / count, 3) if count else 0.0,
+                "p50_ms": round(bucket_quantile(COMMAND_BUCKETS, counts, 0.50) * 1000, 3),
+                "p99_ms": round(bucket_quantile(COMMAND_BUCKETS, counts, 0.99) * 1000, 3),
+                "failures": failures.get((route, name), 0),
+            }
+        with self._lock:
+            return {
+                "slow_threshold_ms": self.slow_ms,
+                "slow": self.slow,
+                "routes": routes,
+                "recent_slow": list(self.recent_slow),
+            }
+
+
+command_monitor = CommandMonitor(
+    slow_ms=settings.slow_query_ms,
+    explain=settings.slow_query_explain,
+    explain_interval=settings.slow_query_explain_interval_seconds,
+)
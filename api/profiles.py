@@ -0,0 +1,11 @@
+import os
+import tempfile
+
+from .config import settings
+from .utils.profiling import ProfileStore
+
+# Profiles captured by ProfilingMiddleware and served under /admin/profiles
+profile_store = ProfileStore(
+    settings.profile_dir or os.path.join(tempfile.gettempdir(), "ultimate-library-profiles"),
+    max_files=settings.profile_max_files,
+)
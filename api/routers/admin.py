@@ -0,0 +1,93 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import FileResponse, PlainTextResponse
+
+from ..models.user import UserInDB
+from ..auth.auth_utils import get_current_admin_user
+from ..auth.hashing import hash_pool
+from ..utils.cache import caches
+from ..config import settings
+from ..database import client_options
+from ..monitoring import command_monitor
+from ..profiles import profile_store
+from ..utils.mongo_pool import pool_monitor
+from ..utils.serialization import FastJSONResponse, api_response
+
+router = APIRouter(default_response_class=FastJSONResponse)
+
+@router.get("/admin/cache")
+async def get_cache_stats(current_user: UserInDB = Depends(get_current_admin_user)):
+    """
+    Hit/miss/eviction counters of the in-process caches - Admin only
+    """
+    return api_response({
+        "msg": "Ok",
+        "data": {name: cache.stats() for name, cache in caches.items()}
+    })
+
+@router.get("/admin/hashing")
+async def get_hashing_stats(current_user: UserInDB = Depends(get_current_admin_user)):
+    """
+    Password hashing pool concurrency and queue depth - Admin only
+    """
+    return api_response({
+        "msg": "Ok",
+        "data": hash_pool.stats()
+    })
+
+@router.get("/admin/mongo-pool")
+async def get_mongo_pool_stats(current_user: UserInDB = Depends(get_current_admin_user)):
+    """
+    MongoDB connection profile, pool usage and checkout wait times - Admin only
+    """
+    return api_response({
+        "msg": "Ok",
+        "data": {
+            "profile": settings.mongo_profile,
+            "options": client_options(),
+            "pool": pool_monitor.stats()
+        }
+    })
+
+@router.get("/admin/mongo-commands")
+async def get_mongo_command_stats(current_user: UserInDB = Depends(get_current_admin_user)):
+    """
+    MongoDB command latency per route and the most recent slow commands - Admin only
+    """
+    return api_response({
+        "msg": "Ok",
+        "data": command_monitor.stats()
+    })
+
+@router.get("/admin/profiles")
+async def list_profiles(current_user: UserInDB = Depends(get_current_admin_user)):
+    """
+    Stored request profiles, newest first - Admin only
+    """
+    return api_response({
+        "msg": "Ok",
+        "data": profile_store.list()
+    })
+
+@router.get("/admin/profiles/{profile_id}")
+async def get_profile(
+    profile_id: str,
+    format: str = Query("text", regex="^(text|pstats)$", description="text: top functions by sort order, pstats: the raw profile file"),
+    sort: str = Query("cumulative", regex="^(cumulative|tottime|calls)$"),
+    current_user: UserInDB = Depends(get_current_admin_user)
+):
+    """
+    One request profile, as a pstats summary or the .prof file - Admin only
+    """
+    if format == "pstats":
+        path = profile_store.path(profile_id)
+        if path is not None:
+            return FileResponse(path, media_type="application/octet-stream", filename=f"{profile_id}.prof")
+    else:
+        summary = profile_store.summary(profile_id, sort=sort)
+        if summary is not None:
+            return PlainTextResponse(summary)
+    
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Profile not found"
+    )
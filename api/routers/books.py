@@ -1,76 +1,452 @@
 from datetime import datetime
-from typing import Optional
-from fastapi import APIRouter, HTTPException, status, Query, Depends
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, status, Query, Depends, Body, Request, Header
+from fastapi.responses import StreamingResponse
 from bson import ObjectId
-from pymongo import ASCENDING, DESCENDING
+from pydantic import ValidationError
+from pymongo import ASCENDING, UpdateOne
+from pymongo.errors import BulkWriteError
 import math
 
-from ..models.book import Book, BookCreate, BookUpdate
+from ..models.book import Book, BookCreate, BookUpdate, BookBulkDelete
 from ..models.user import UserInDB
 from ..database import get_book_collection
 from ..auth.auth_utils import get_current_active_user
+from ..utils.pagination import fetch_page
+from ..utils.search import (
+    BOOK_PROJECTION, SEARCH_FIELDS, prefix_query, search_tokens, text_query
+)
+from ..utils.cache import MISSING, TTLCache
+from ..utils.projection import BOOK_FIELDS, field_projection, parse_fields
+from ..utils.etag import compute_etag, compute_raw_etag, etag_matches, not_modified
+from ..utils.serialization import (
+    FastJSONResponse, api_response, dumps, encode, to_json
+)
+from ..utils.negotiation import NegotiatedRoute, response_media_type
+from ..utils.bson_json import RAW_CODEC_OPTIONS, raw_array, raw_document
+from ..utils.catalog_io import (
+    BookImporter, ImportProgressResponse, RequestBody, export_csv, export_ndjson,
+    iter_csv_records, iter_lines, iter_ndjson_records
+)
+from ..utils.deadline import server_error
+from ..utils.timing import phase
+from ..config import settings
 
-router = APIRouter()
+router = APIRouter(default_response_class=FastJSONResponse, route_class=NegotiatedRoute)
 
-@router.get("/books", response_model=dict)
+# Read-through cache for book reads; writes invalidate the affected entries
+book_cache = TTLCache(
+    "books",
+    max_entries=settings.book_cache_max_entries,
+    ttl_seconds=settings.book_cache_ttl_seconds,
+    max_bytes=settings.book_cache_max_bytes,
+    enabled=settings.book_cache_enabled,
+)
+LISTING_TAG = "books:list"
+
+def invalidate_book_cache(book_id: Optional[str] = None):
+    """Drop every cached listing and, if given, the cached book itself"""
+    if book_id is not None:
+        book_cache.invalidate_tag(f"book:{ObjectId(book_id)}")
+    book_cache.invalidate_tag(LISTING_TAG)
+
+@router.get("/books")
 async def get_books(
     limit: int = Query(5, ge=1, le=100),
     page: int = Query(1, ge=1),
     order_by: str = Query("name", regex="^(name|author|price|created_at|updated_at)$"),
     sort_by: str = Query("asc", regex="^(asc|desc)$"),
-    keyword: Optional[str] = Query(None, min_length=1)
+    keyword: Optional[str] = Query(None, min_length=1),
+    search_mode: str = Query("regex", regex="^(text|prefix|regex)$", description="regex: substring of the name (default), text: ranked whole words, prefix: type-ahead"),
+    cursor: Optional[str] = Query(None, description="Keyset cursor; send an empty value for the first page"),
+    include_total: bool = Query(True, description="Set to false to skip counting totalItems"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. name,price; id is always included"),
+    if_none_match: Optional[str] = Header(None)
 ):
     """
-    Get books with pagination and search - maintains the same structure as Node.js API
+    Get books with pagination and search - maintains the same structure as Node.js API.
+    Passing `cursor` switches to keyset pagination, where every page costs the same.
+    `keyword` searches name, author and description through the books indexes.
+    Responses carry an ETag; a matching If-None-Match gets 304 Not Modified.
+    With RAW_BSON_READS the page is transcoded from raw BSON without building dicts.
     """
     try:
-        book_collection = await get_book_collection()
+        # Normalize the parameters into the cache key
+        if keyword and search_mode != "regex":
+            keyword = " ".join(keyword.lower().split())
+        selected = parse_fields(fields, BOOK_FIELDS)
+        cache_key = (
+            "books", limit, page if cursor is None else None, cursor,
+            order_by, sort_by, keyword, search_mode, include_total, selected,
+            response_media_type()
+        )
+        cached = book_cache.get(cache_key)
+        if cached is not MISSING:
+            etag, body = cached
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+            return api_response(body, headers={"ETag": etag})
+        generation = book_cache.generation
         
-        # Calculate skip for pagination
-        skip = (page - 1) * limit
+        book_collection = await get_book_collection()
+        if settings.raw_bson_reads:
+            book_collection = book_collection.with_options(codec_options=RAW_CODEC_OPTIONS)
         
         # Build query
         query = {}
+        sort = None
         if keyword:
-            query["name"] = {"$regex": keyword, "$options": "i"}
+            if search_mode == "text":
+                query = text_query(keyword)
+                # Rank by relevance; scores cannot be seeked, so no cursor here
+                sort = [("score", {"$meta": "textScore"}), ("_id", ASCENDING)]
+                if cursor is not None:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail="Cursor pagination is not available for search_mode=text"
+                    )
+            elif search_mode == "prefix":
+                query = prefix_query(keyword)
+            else:
+                query["name"] = {"$regex": keyword, "$options": "i"}
         
-        # Set sort order
-        sort_order = ASCENDING if sort_by == "asc" else DESCENDING
+        # Keyset mode seeks past the cursor instead of skipping documents
+        skip = 0 if cursor is not None else (page - 1) * limit
         
-        # Execute query with pagination
-        cursor = book_collection.find(query).skip(skip).limit(limit).sort(order_by, sort_order)
-        books = await cursor.to_list(length=limit)
+        # Fetch the page and the total count concurrently
+        books, next_cursor, total_items = await fetch_page(
+            book_collection, query, order_by, sort_by, limit,
+            skip=skip, cursor=cursor, projection=field_projection(selected, BOOK_PROJECTION),
+            include_total=include_total, sort=sort
+        )
         
-        # Count total documents
-        total_items = await book_collection.count_documents(query)
+        # Answer revalidations before building the response
+        if settings.raw_bson_reads:
+            etag = compute_raw_etag(books, total_items, next_cursor)
+        else:
+            etag = compute_etag(books, total_items, next_cursor)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
         
-        # Convert ObjectId to string for JSON serialization
-        for book in books:
-            book["id"] = str(book["_id"])
-            del book["_id"]
+        with phase("serialize"):
+            if settings.raw_bson_reads:
+                books = raw_array(books, selected)
+            else:
+                for book in books:
+                    to_json(book)
         
         # Build response - same structure as Node.js
         response = {
             "msg": "Ok",
-            "data": books,
-            "totalItems": total_items,
-            "totalPages": math.ceil(total_items / limit),
-            "limit": limit,
-            "currentPage": page
+            "data": books
         }
+        if include_total:
+            response["totalItems"] = total_items
+            response["totalPages"] = math.ceil(total_items / limit)
+        response["limit"] = limit
+        if cursor is None:
+            response["currentPage"] = page
+        response["next_cursor"] = next_cursor
         
-        return response
+        # Cache the encoded body so hits skip serialization entirely
+        with phase("serialize"):
+            body = encode(response)
+        book_cache.set(cache_key, (etag, body), tags=(LISTING_TAG,), generation=generation)
+        return api_response(body, headers={"ETag": etag})
         
+    except HTTPException:
+        raise
     except Exception as error:
+        raise server_error(error)
+
+# Import, export and bulk endpoints are declared before /books/{book_id} so their
+# path segment is never read as an ID
+
+@router.post("/books/import")
+async def import_books(
+    request: Request,
+    format: str = Query("ndjson", regex="^(ndjson|csv)$"),
+    mode: str = Query("insert", regex="^(insert|upsert)$", description="upsert matches existing books on (name, author)"),
+    chunk_size: int = Query(500, ge=1, le=5000),
+    current_user: UserInDB = Depends(get_current_active_user)
+):
+    """
+    Import books from an NDJSON or CSV request body - requires authentication.
+    The body is read and validated incrementally, written in unordered batches of
+    `chunk_size`, and progress/error events are streamed back as NDJSON.
+    """
+    book_collection = await get_book_collection()
+    body = RequestBody(request)
+    lines = iter_lines(body)
+    records = iter_csv_records(lines) if format == "csv" else iter_ndjson_records(lines)
+    importer = BookImporter(book_collection, mode=mode, chunk_size=chunk_size)
+    
+    def invalidate_imported():
+        # Upserts may rewrite any cached book, and bulk_write does not say which
+        if mode == "upsert":
+            book_cache.clear()
+        else:
+            invalidate_book_cache()
+    
+    async def events():
+        try:
+            async for event in importer.run(records):
+                if event["event"] != "error":
+                    invalidate_imported()  # a batch was just written
+                yield dumps(event) + b"\n"
+        finally:
+            invalidate_imported()
+    
+    return ImportProgressResponse(events(), body, media_type="application/x-ndjson")
+
+@router.get("/books/export")
+async def export_books(
+    format: str = Query("ndjson", regex="^(ndjson|csv)$"),
+    batch_size: int = Query(1000, ge=100, le=10000),
+    current_user: UserInDB = Depends(get_current_active_user)
+):
+    """
+    Stream the whole catalog as NDJSON or CSV - requires authentication.
+    Books are read one cursor batch at a time, so memory stays flat however big the catalog is.
+    """
+    book_collection = await get_book_collection()
+    cursor = book_collection.find({}, dict(BOOK_PROJECTION)).sort("_id", ASCENDING).batch_size(batch_size)
+    
+    if format == "csv":
+        body, media_type = export_csv(cursor), "text/csv; charset=utf-8"
+    else:
+        body, media_type = export_ndjson(cursor), "application/x-ndjson"
+    
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="books.{format}"'}
+    )
+
+
+def _validation_errors(error: ValidationError) -> list:
+    """Compact, JSON-safe form of a pydantic validation error"""
+    return [
+        {"loc": list(detail["loc"]), "msg": detail["msg"], "type": detail["type"]}
+        for detail in error.errors()
+    ]
+
+def _check_batch_size(items: list):
+    if not items:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No items provided"
+        )
+    if len(items) > settings.bulk_max_items:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(error)
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.bulk_max_items} items per request"
         )
 
-@router.get("/books/{book_id}", response_model=dict)
-async def get_book(book_id: str):
+def _bulk_response(results: list) -> FastJSONResponse:
+    succeeded = sum(1 for result in results if result["status"] != "error")
+    return api_response({
+        "msg": "Ok",
+        "data": {
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded,
+            "results": results
+        }
+    })
+
+@router.post("/books/bulk")
+async def create_books_bulk(
+    items: List[dict] = Body(...),
+    current_user: UserInDB = Depends(get_current_active_user)
+):
+    """
+    Create many books in one unordered insert - requires authentication.
+    Every item is validated on its own; invalid or rejected items do not stop the rest.
+    """
+    try:
+        _check_batch_size(items)
+        book_collection = await get_book_collection()
+        
+        results = [None] * len(items)
+        documents, positions = [], []
+        now = datetime.utcnow()
+        for index, item in enumerate(items):
+            try:
+                book_dict = BookCreate(**item).dict()
+            except ValidationError as error:
+                results[index] = {"index": index, "status": "error", "errors": _validation_errors(error)}
+                continue
+            book_dict["created_at"] = now
+            book_dict["updated_at"] = now
+            book_dict["search_tokens"] = search_tokens(book_dict)
+            documents.append(book_dict)
+            positions.append(index)
+        
+        failed_writes = {}
+        if documents:
+            try:
+                await book_collection.insert_many(documents, ordered=False)
+            except BulkWriteError as error:
+                failed_writes = {
+                    write_error["index"]: write_error["errmsg"]
+                    for write_error in error.details.get("writeErrors", [])
+                }
+            finally:
+                # Any failure may come after part of the batch was written
+                invalidate_book_cache()
+        
+        # insert_many assigns _id client-side, so no re-read is needed
+        for offset, (index, document) in enumerate(zip(positions, documents)):
+            if offset in failed_writes:
+                results[index] = {"index": index, "status": "error", "errors": [{"msg": failed_writes[offset]}]}
+            else:
+                results[index] = {"index": index, "status": "created", "id": str(document["_id"])}
+        
+        return _bulk_response(results)
+        
+    except HTTPException:
+        raise
+    except Exception as error:
+        raise server_error(error)
+
+@router.patch("/books/bulk")
+async def update_books_bulk(
+    items: List[dict] = Body(..., description='Each item is {"id": ..., <BookUpdate fields>}'),
+    current_user: UserInDB = Depends(get_current_active_user)
+):
     """
-    Get a single book by ID - maintains the same structure as Node.js API
+    Partially update many books in one unordered bulk write - requires authentication
+    """
+    try:
+        _check_batch_size(items)
+        book_collection = await get_book_collection()
+        
+        results = [None] * len(items)
+        operations, targets = [], []
+        now = datetime.utcnow()
+        for index, item in enumerate(items):
+            book_id = item.get("id")
+            if not isinstance(book_id, str) or not ObjectId.is_valid(book_id):
+                results[index] = {"index": index, "status": "error", "errors": [{"msg": "Invalid book ID"}]}
+                continue
+            try:
+                fields = {key: value for key, value in item.items() if key != "id"}
+                update_data = {
+                    field: value
+                    for field, value in BookUpdate(**fields).dict(exclude_unset=True).items()
+                    if value is not None
+                }
+            except ValidationError as error:
+                results[index] = {"index": index, "status": "error", "errors": _validation_errors(error)}
+                continue
+            if not update_data:
+                results[index] = {"index": index, "status": "error", "errors": [{"msg": "No fields to update"}]}
+                continue
+            update_data["updated_at"] = now
+            operations.append(UpdateOne({"_id": ObjectId(book_id)}, {"$set": update_data}))
+            targets.append((index, ObjectId(book_id), update_data))
+        
+        failed_writes, stored = {}, {}
+        if operations:
+            try:
+                await book_collection.bulk_write(operations, ordered=False)
+            except BulkWriteError as error:
+                failed_writes = {
+                    write_error["index"]: write_error["errmsg"]
+                    for write_error in error.details.get("writeErrors", [])
+                }
+            finally:
+                # Any failure may come after part of the batch was written
+                invalidate_book_cache()
+                for _, book_id, _ in targets:
+                    book_cache.invalidate_tag(f"book:{book_id}")
+            
+            # One read tells which books exist and gives what search_tokens needs
+            projection = {field: 1 for field in SEARCH_FIELDS}
+            projection["updated_at"] = 1
+            stored = {
+                book["_id"]: book
+                async for book in book_collection.find({"_id": {"$in": [target[1] for target in targets]}}, projection)
+            }
+            retokenize = {
+                book_id for _, book_id, update_data in targets
+                if any(field in update_data for field in SEARCH_FIELDS)
+            }
+            token_updates = [
+                UpdateOne(
+                    {"_id": book["_id"], "updated_at": book["updated_at"]},
+                    {"$set": {"search_tokens": search_tokens(book)}}
+                )
+                for book in stored.values() if book["_id"] in retokenize
+            ]
+            if token_updates:
+                await book_collection.bulk_write(token_updates, ordered=False)
+        
+        for offset, (index, book_id, _) in enumerate(targets):
+            if offset in failed_writes:
+                results[index] = {"index": index, "status": "error", "errors": [{"msg": failed_writes[offset]}]}
+            elif book_id not in stored:
+                results[index] = {"index": index, "status": "error", "errors": [{"msg": "Book not found"}]}
+            else:
+                results[index] = {"index": index, "status": "updated", "id": str(book_id)}
+        
+        return _bulk_response(results)
+        
+    except HTTPException:
+        raise
+    except Exception as error:
+        raise server_error(error)
+
+@router.delete("/books/bulk")
+async def delete_books_bulk(
+    payload: BookBulkDelete,
+    current_user: UserInDB = Depends(get_current_active_user)
+):
+    """
+    Delete many books by ID in one round trip - requires authentication
+    """
+    try:
+        _check_batch_size(payload.ids)
+        book_collection = await get_book_collection()
+        
+        valid_ids = [ObjectId(book_id) for book_id in payload.ids if ObjectId.is_valid(book_id)]
+        existing = set()
+        if valid_ids:
+            async for book in book_collection.find({"_id": {"$in": valid_ids}}, {"_id": 1}):
+                existing.add(book["_id"])
+            if existing:
+                try:
+                    await book_collection.delete_many({"_id": {"$in": list(existing)}})
+                finally:
+                    invalidate_book_cache()
+                    for book_id in existing:
+                        book_cache.invalidate_tag(f"book:{book_id}")
+        
+        results = []
+        for index, book_id in enumerate(payload.ids):
+            if not ObjectId.is_valid(book_id):
+                results.append({"index": index, "status": "error", "errors": [{"msg": "Invalid book ID"}]})
+            elif ObjectId(book_id) not in existing:
+                results.append({"index": index, "status": "error", "errors": [{"msg": "Book not found"}]})
+            else:
+                results.append({"index": index, "status": "deleted", "id": book_id})
+        
+        return _bulk_response(results)
+        
+    except HTTPException:
+        raise
+    except Exception as error:
+        raise server_error(error)
+
+@router.get("/books/{book_id}")
+async def get_book(
+    book_id: str,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return; id is always included"),
+    if_none_match: Optional[str] = Header(None)
+):
+    """
+    Get a single book by ID - maintains the same structure as Node.js API.
+    Responses carry an ETag; a matching If-None-Match gets 304 Not Modified.
     """
     try:
         # Validate ObjectId
@@ -80,29 +456,48 @@ async def get_book(book_id: str):
                 detail="Invalid book ID"
             )
             
+        selected = parse_fields(fields, BOOK_FIELDS)
+        cache_key = ("book", str(ObjectId(book_id)), selected, response_media_type())
+        cached = book_cache.get(cache_key)
+        if cached is not MISSING:
+            etag, body = cached
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+            return api_response(body, headers={"ETag": etag})
+        generation = book_cache.generation
+        
         book_collection = await get_book_collection()
-        book = await book_collection.find_one({"_id": ObjectId(book_id)})
+        if settings.raw_bson_reads:
+            book_collection = book_collection.with_options(codec_options=RAW_CODEC_OPTIONS)
+        with phase("find"):
+            book = await book_collection.find_one({"_id": ObjectId(book_id)}, field_projection(selected, BOOK_PROJECTION))
         
         if book:
-            book["id"] = str(book["_id"])
-            del book["_id"]
-            return {
-                "msg": "Ok",
-                "data": book
-            }
+            if settings.raw_bson_reads:
+                etag = compute_raw_etag([book])
+            else:
+                etag = compute_etag([book])
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+            with phase("serialize"):
+                body = encode({
+                    "msg": "Ok",
+                    "data": raw_document(book, selected) if settings.raw_bson_reads else to_json(book)
+                })
+            book_cache.set(cache_key, (etag, body), tags=(f"book:{cache_key[1]}",), generation=generation)
+            return api_response(body, headers={"ETag": etag})
         
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Book not found"
         )
         
+    except HTTPException:
+        raise
     except Exception as error:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(error)
-        )
+        raise server_error(error)
 
-@router.post("/books", response_model=dict)
+@router.post("/books")
 async def create_book(
     book: BookCreate,
     current_user: UserInDB = Depends(get_current_active_user)
@@ -117,27 +512,58 @@ async def create_book(
         book_dict = book.dict()
         book_dict["created_at"] = datetime.utcnow()
         book_dict["updated_at"] = datetime.utcnow()
+        book_dict["search_tokens"] = search_tokens(book_dict)
         
         # Insert book
         result = await book_collection.insert_one(book_dict)
+        invalidate_book_cache()
         
         # Get the created book
-        created_book = await book_collection.find_one({"_id": result.inserted_id})
-        created_book["id"] = str(created_book["_id"])
-        del created_book["_id"]
+        created_book = await book_collection.find_one({"_id": result.inserted_id}, dict(BOOK_PROJECTION))
         
-        return {
+        return api_response({
             "msg": "Ok",
-            "data": created_book
-        }
+            "data": to_json(created_book)
+        })
         
+    except HTTPException:
+        raise
     except Exception as error:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(error)
+        raise server_error(error)
+
+async def _update_with_tokens(book_collection, book_id: ObjectId, update_data: dict, attempts: int = 3) -> Optional[dict]:
+    """Apply `update_data` and the search_tokens it implies in a single write.
+    
+    Searchable fields the update leaves alone are read first and the write is
+    conditioned on them, so a concurrent change to them is retried rather than
+    leaving stale tokens behind.
+    """
+    unchanged = [field for field in SEARCH_FIELDS if field not in update_data]
+    if len(unchanged) == len(SEARCH_FIELDS):
+        return await book_collection.find_one_and_update(
+            {"_id": book_id}, {"$set": update_data}, projection=dict(BOOK_PROJECTION), return_document=True
         )
+    for _ in range(attempts):
+        query, stored = {"_id": book_id}, {}
+        if unchanged:
+            stored = await book_collection.find_one(query, {field: 1 for field in unchanged})
+            if stored is None:
+                return None
+            query.update({field: stored.get(field) for field in unchanged})
+        result = await book_collection.find_one_and_update(
+            query,
+            {"$set": {**update_data, "search_tokens": search_tokens({**stored, **update_data})}},
+            projection=dict(BOOK_PROJECTION),
+            return_document=True
+        )
+        if result is not None or not unchanged:
+            return result
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="Book is being updated concurrently, retry the request"
+    )
 
-@router.put("/books/{book_id}", response_model=dict)
+@router.put("/books/{book_id}")
 async def update_book(
     book_id: str,
     book_update: BookUpdate,
@@ -171,11 +597,8 @@ async def update_book(
         update_data["updated_at"] = datetime.utcnow()
         
         # Update book
-        result = await book_collection.find_one_and_update(
-            {"_id": ObjectId(book_id)},
-            {"$set": update_data},
-            return_document=True
-        )
+        result = await _update_with_tokens(book_collection, ObjectId(book_id), update_data)
+        invalidate_book_cache(book_id)
         
         if not result:
             raise HTTPException(
@@ -183,21 +606,17 @@ async def update_book(
                 detail="Book not found"
             )
         
-        result["id"] = str(result["_id"])
-        del result["_id"]
-        
-        return {
+        return api_response({
             "msg": "Ok",
-            "data": result
-        }
+            "data": to_json(result)
+        })
         
+    except HTTPException:
+        raise
     except Exception as error:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(error)
-        )
+        raise server_error(error)
 
-@router.delete("/books/{book_id}", response_model=dict)
+@router.delete("/books/{book_id}")
 async def delete_book(
     book_id: str,
     current_user: UserInDB = Depends(get_current_active_user)
@@ -217,6 +636,7 @@ async def delete_book(
         
         # Delete book
         result = await book_collection.delete_one({"_id": ObjectId(book_id)})
+        invalidate_book_cache(book_id)
         
         if result.deleted_count == 0:
             raise HTTPException(
@@ -224,10 +644,9 @@ async def delete_book(
                 detail="Book not found"
             )
         
-        return {"msg": "Ok"}
+        return api_response({"msg": "Ok"})
         
+    except HTTPException:
+        raise
     except Exception as error:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(error)
-        )
+        raise server_error(error)
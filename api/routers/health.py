@@ -0,0 +1,131 @@
+import asyncio
+import time
+from typing import Optional
+
+import pymongo
+from fastapi import APIRouter, status
+
+from ..config import settings
+from ..database import client_options, connect_to_mongo, db
+from ..utils.loop_lag import loop_monitor
+from ..utils.mongo_pool import pool_monitor
+from ..utils.cache import caches
+from ..utils.serialization import FastJSONResponse, api_response
+
+router = APIRouter(default_response_class=FastJSONResponse)
+
+
+class PingCache:
+    """Result of the last MongoDB ping, reused for a short while.
+
+    Load balancers probe every few seconds from several places; within
+    `ttl` seconds they all get the same answer, and concurrent probes share
+    one ping.
+    """
+
+    def __init__(self, ttl: float, timeout: float):
+        self.ttl = ttl
+        self.timeout = timeout
+        self.result: Optional[dict] = None
+        self.checked_at = 0.0
+        self._pinging: Optional[asyncio.Task] = None
+
+    async def _ping(self) -> dict:
+        started = time.perf_counter()
+        try:
+            # Connecting is shared with requests, so a slow attempt is only waited on, not cut short
+            await asyncio.wait_for(connect_to_mongo(), self.timeout)
+            with pymongo.timeout(self.timeout):
+                await db.client.admin.command("ping")
+            error = None
+        except Exception as failure:
+            error = str(failure) or type(failure).__name__
+        return {
+            "ok": error is None,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 3),
+            "error": error,
+        }
+
+    async def check(self) -> dict:
+        if self.result is None or time.monotonic() - self.checked_at > self.ttl:
+            if self._pinging is None:
+                self._pinging = asyncio.ensure_future(self._ping())
+            pinging = self._pinging
+            try:
+                result = await asyncio.shield(pinging)
+            finally:
+                if pinging.done() and self._pinging is pinging:
+                    self._pinging = None
+            self.result, self.checked_at = result, time.monotonic()
+        return {**self.result, "age_seconds": round(time.monotonic() - self.checked_at, 3)}
+
+
+ping_cache = PingCache(
+    ttl=settings.health_ping_cache_seconds,
+    timeout=settings.health_ping_timeout_ms / 1000,
+)
+
+
+def cache_warmth() -> dict:
+    warmth = {}
+    for name, cache in caches.items():
+        stats = cache.stats()
+        warmth[name] = {"entries": stats["entries"], "hit_rate": stats["hit_rate"]}
+    return warmth
+
+
+def pool_utilisation() -> dict:
+    pool = pool_monitor.stats()
+    max_pool_size = client_options().get("maxPoolSize") or 100
+    return {
+        "open": pool["open"],
+        "in_use": pool["in_use"],
+        "waiting": pool["waiting"],
+        "max_pool_size": max_pool_size,
+        "utilisation": round(pool["in_use"] / max_pool_size, 3),
+        "p99_wait_ms": pool["p99_wait_ms"],
+    }
+
+
+@router.get("/health/live")
+async def liveness():
+    """
+    The process is up and its event loop answers; never touches MongoDB
+    """
+    return api_response({"status": "alive", "version": settings.version})
+
+
+@router.get("/health/ready")
+async def readiness():
+    """
+    Whether this instance should receive traffic: MongoDB answers a ping, the
+    event loop is not lagging and requests are not queueing for connections.
+    Responds 503 otherwise, so load balancers drain it before latency degrades.
+    """
+    mongo = await ping_cache.check()
+    pool = pool_utilisation()
+    lag_ms = await loop_monitor.sample() * 1000
+
+    reasons = []
+    if not mongo["ok"]:
+        reasons.append("mongodb ping failed")
+    if lag_ms > settings.health_max_loop_lag_ms:
+        reasons.append("event loop lagging")
+    if pool["waiting"] > settings.health_max_pool_waiting:
+        reasons.append("requests queueing for connections")
+
+    return api_response(
+        {
+            "status": "not_ready" if reasons else "ready",
+            "reasons": reasons,
+            "version": settings.version,
+            "checks": {
+                "mongodb": mongo,
+                "pool": pool,
+                "event_loop": loop_monitor.stats(),
+                "caches": cache_warmth(),
+            },
+        },
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE if reasons else status.HTTP_200_OK,
+        headers={"Cache-Control": "no-store"},
+    )
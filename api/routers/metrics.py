@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import secrets
+from typing import List, Optional
+
+from fastapi import APIRouter, Header, HTTPException, status
+from fastapi.responses import Response
+
+from ..auth.hashing import hash_pool
+from ..config import settings
+from ..utils.cache import caches
+from ..utils.mongo_pool import pool_monitor
+from ..utils.metrics import CONTENT_TYPE, Family, MultiProcessStore, Sample, registry, render
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Set when worker processes share a directory to aggregate their metrics
+store = MultiProcessStore(
+    settings.metrics_dir,
+    stale_after=3 * settings.metrics_flush_interval_seconds,
+) if settings.metrics_dir else None
+
+
+def collect_mongo_pool() -> List[Family]:
+    pool = pool_monitor.stats()
+    return [
+        Family("mongo_pool_connections", "gauge", "Open connections in the MongoDB pool", [Sample("mongo_pool_connections", {}, pool["open"])]),
+        Family("mongo_pool_connections_in_use", "gauge", "Pool connections checked out", [Sample("mongo_pool_connections_in_use", {}, pool["in_use"])]),
+        Family("mongo_pool_waiting", "gauge", "Operations waiting for a pool connection", [Sample("mongo_pool_waiting", {}, pool["waiting"])]),
+        Family("mongo_pool_checkouts_total", "counter", "Successful pool checkouts", [Sample("mongo_pool_checkouts_total", {}, pool["checkouts"])]),
+        Family("mongo_pool_checkout_failures_total", "counter", "Failed pool checkouts by reason", [
+            Sample("mongo_pool_checkout_failures_total", {"reason": reason}, count)
+            for reason, count in pool["checkout_failures"].items()
+        ]),
+    ]
+
+
+def collect_hashing() -> List[Family]:
+    pool = hash_pool.stats()
+    return [
+        Family("password_hash_in_flight", "gauge", "bcrypt hashes running", [Sample("password_hash_in_flight", {}, pool["in_flight"])]),
+        Family("password_hash_waiting", "gauge", "Requests queued for the bcrypt pool", [Sample("password_hash_waiting", {}, pool["waiting"])]),
+        Family("password_hash_rejected_total", "counter", "Requests rejected by the bcrypt pool with 503", [Sample("password_hash_rejected_total", {}, pool["rejected"])]),
+    ]
+
+
+def collect_caches() -> List[Family]:
+    stats = {name: cache.stats() for name, cache in caches.items()}
+    families = []
+    for field, kind, help in (
+        ("hits", "counter", "Cache lookups that found a fresh entry"),
+        ("misses", "counter", "Cache lookups that found nothing"),
+        ("evictions", "counter", "Entries evicted to stay within the cache limits"),
+        ("entries", "gauge", "Entries currently cached"),
+        ("bytes", "gauge", "Approximate size of the cached entries"),
+    ):
+        suffix = "_total" if kind == "counter" else ""
+        name = f"cache_{field}{suffix}"
+        families.append(Family(name, kind, help, [
+            Sample(name, {"cache": cache}, values[field]) for cache, values in stats.items()
+        ]))
+    return families
+
+
+for collector in (collect_mongo_pool, collect_hashing, collect_caches):
+    registry.add_collector(collector)
+
+
+def flush():
+    """Write this worker's snapshot for the others to aggregate"""
+    store.write(registry.collect())
+
+
+async def flush_periodically():
+    while True:
+        await asyncio.sleep(settings.metrics_flush_interval_seconds)
+        try:
+            await asyncio.to_thread(flush)
+        except OSError as error:
+            logger.warning(f"Could not write metrics snapshot: {error}")
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics(authorization: Optional[str] = Header(None)):
+    """
+    Prometheus metrics of this process, or of all workers with METRICS_DIR
+    """
+    if settings.metrics_token and not secrets.compare_digest(
+        authorization or "", f"Bearer {settings.metrics_token}"
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token"
+        )
+    if store is None:
+        families = registry.collect()
+    else:
+        await asyncio.to_thread(flush)
+        families = await asyncio.to_thread(store.read)
+    return Response(render(families), media_type=CONTENT_TYPE)
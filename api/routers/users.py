@@ -1,9 +1,8 @@
 from datetime import datetime, timedelta
 from typing import Optional
-from fastapi import APIRouter, HTTPException, status, Query, Depends
+from fastapi import APIRouter, HTTPException, status, Query, Depends, Header
 from fastapi.security import OAuth2PasswordRequestForm
 from bson import ObjectId
-from pymongo import ASCENDING, DESCENDING
 import math
 
 from ..models.user import (
@@ -12,14 +11,22 @@ from ..models.user import (
 )
 from ..database import get_user_collection
 from ..auth.auth_utils import (
-    get_password_hash, verify_password, create_access_token,
-    authenticate_user, get_current_active_user, get_current_admin_user
+    get_password_hash_async, verify_password_async, create_access_token,
+    authenticate_user, get_current_active_user, get_current_admin_user,
+    get_user_by_email, invalidate_principal
 )
 from ..config import settings
+from ..utils.pagination import fetch_page
+from ..utils.projection import USER_FIELDS, field_projection, parse_fields
+from ..utils.etag import compute_etag, etag_matches, not_modified
+from ..utils.serialization import FastJSONResponse, api_response, to_json
+from ..utils.negotiation import NegotiatedRoute
+from ..utils.deadline import server_error
+from ..utils.timing import phase
 
-router = APIRouter()
+router = APIRouter(default_response_class=FastJSONResponse, route_class=NegotiatedRoute)
 
-@router.post("/auth/register", response_model=dict)
+@router.post("/auth/register")
 async def register_user(user: UserCreate):
     """
     Register a new user
@@ -40,7 +47,7 @@ async def register_user(user: UserCreate):
             )
         
         # Hash password
-        hashed_password = get_password_hash(user.password)
+        hashed_password = await get_password_hash_async(user.password)
         
         # Create user document
         user_dict = user.dict()
@@ -64,23 +71,18 @@ async def register_user(user: UserCreate):
             {"_id": result.inserted_id},
             {"hashed_password": 0}
         )
-        created_user["id"] = str(created_user["_id"])
-        del created_user["_id"]
         
-        return {
+        return api_response({
             "msg": "User registered successfully",
-            "data": created_user
-        }
+            "data": to_json(created_user)
+        })
         
     except HTTPException:
         raise
     except Exception as error:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(error)
-        )
+        raise server_error(error)
 
-@router.post("/auth/login", response_model=dict)
+@router.post("/auth/login")
 async def login_user(user_credentials: UserLogin):
     """
     Authenticate user and return JWT token
@@ -115,8 +117,9 @@ async def login_user(user_credentials: UserLogin):
             {"_id": ObjectId(user.id)},
             {"$set": {"last_login": datetime.utcnow()}}
         )
+        invalidate_principal(user.id)
         
-        return {
+        return api_response({
             "msg": "Login successful",
             "data": {
                 "access_token": access_token,
@@ -129,17 +132,14 @@ async def login_user(user_credentials: UserLogin):
                     "role": user.role
                 }
             }
-        }
+        })
         
     except HTTPException:
         raise
     except Exception as error:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(error)
-        )
+        raise server_error(error)
 
-@router.get("/users/me", response_model=dict)
+@router.get("/users/me")
 async def get_current_user_profile(current_user: UserInDB = Depends(get_current_active_user)):
     """
     Get current user profile
@@ -160,12 +160,12 @@ async def get_current_user_profile(current_user: UserInDB = Depends(get_current_
         "updated_at": current_user.updated_at
     }
     
-    return {
+    return api_response({
         "msg": "Ok",
         "data": user_data
-    }
+    })
 
-@router.put("/users/me", response_model=dict)
+@router.put("/users/me")
 async def update_current_user_profile(
     user_update: UserUpdate,
     current_user: UserInDB = Depends(get_current_active_user)
@@ -209,24 +209,19 @@ async def update_current_user_profile(
             return_document=True,
             projection={"hashed_password": 0}
         )
+        invalidate_principal(current_user.id)
         
-        result["id"] = str(result["_id"])
-        del result["_id"]
-        
-        return {
+        return api_response({
             "msg": "Profile updated successfully",
-            "data": result
-        }
+            "data": to_json(result)
+        })
         
     except HTTPException:
         raise
     except Exception as error:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(error)
-        )
+        raise server_error(error)
 
-@router.put("/users/me/password", response_model=dict)
+@router.put("/users/me/password")
 async def change_password(
     password_update: UserPasswordUpdate,
     current_user: UserInDB = Depends(get_current_active_user)
@@ -235,15 +230,16 @@ async def change_password(
     Change user password
     """
     try:
-        # Verify current password
-        if not verify_password(password_update.current_password, current_user.hashed_password):
+        # Verify current password against the stored hash, not the cached principal
+        stored_user = await get_user_by_email(current_user.email)
+        if stored_user is None or not await verify_password_async(password_update.current_password, stored_user.hashed_password):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Current password is incorrect"
             )
         
         # Hash new password
-        new_hashed_password = get_password_hash(password_update.new_password)
+        new_hashed_password = await get_password_hash_async(password_update.new_password)
         
         # Update password
         user_collection = await get_user_collection()
@@ -256,18 +252,16 @@ async def change_password(
                 }
             }
         )
+        invalidate_principal(current_user.id)
         
-        return {"msg": "Password changed successfully"}
+        return api_response({"msg": "Password changed successfully"})
         
     except HTTPException:
         raise
     except Exception as error:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(error)
-        )
+        raise server_error(error)
 
-@router.get("/users", response_model=dict)
+@router.get("/users")
 async def get_users(
     limit: int = Query(10, ge=1, le=100),
     page: int = Query(1, ge=1),
@@ -276,17 +270,21 @@ async def get_users(
     keyword: Optional[str] = Query(None, min_length=1),
     role: Optional[str] = Query(None, regex="^(admin|user|moderator)$"),
     is_active: Optional[bool] = Query(None),
+    cursor: Optional[str] = Query(None, description="Keyset cursor; send an empty value for the first page"),
+    include_total: bool = Query(True, description="Set to false to skip counting totalItems"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. name,email; id is always included"),
+    if_none_match: Optional[str] = Header(None),
     current_user: UserInDB = Depends(get_current_admin_user)
 ):
     """
-    Get users with pagination and filters - Admin only
+    Get users with pagination and filters - Admin only.
+    Passing `cursor` switches to keyset pagination, where every page costs the same.
+    Responses carry an ETag; a matching If-None-Match gets 304 Not Modified.
     """
     try:
+        selected = parse_fields(fields, USER_FIELDS)
         user_collection = await get_user_collection()
         
-        # Calculate skip for pagination
-        skip = (page - 1) * limit
-        
         # Build query (exclude deleted users)
         query = {"is_deleted": False}
         
@@ -303,52 +301,57 @@ async def get_users(
         if is_active is not None:
             query["is_active"] = is_active
         
-        # Set sort order
-        sort_order = ASCENDING if sort_by == "asc" else DESCENDING
+        # Keyset mode seeks past the cursor instead of skipping documents
+        skip = 0 if cursor is not None else (page - 1) * limit
         
-        # Execute query with pagination
-        cursor = user_collection.find(
-            query, 
-            {"hashed_password": 0}  # Exclude password
-        ).skip(skip).limit(limit).sort(order_by, sort_order)
-        
-        users = await cursor.to_list(length=limit)
+        # Fetch the page (without passwords) and the total count concurrently
+        users, next_cursor, total_items = await fetch_page(
+            user_collection, query, order_by, sort_by, limit,
+            skip=skip, cursor=cursor,
+            projection=field_projection(selected, {"hashed_password": 0}),
+            include_total=include_total
+        )
         
-        # Count total documents
-        total_items = await user_collection.count_documents(query)
+        # Answer revalidations before building the response
+        etag = compute_etag(users, total_items, next_cursor)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
         
-        # Convert ObjectId to string for JSON serialization
         for user in users:
-            user["id"] = str(user["_id"])
-            del user["_id"]
+            to_json(user)
         
         # Build response
         response = {
             "msg": "Ok",
-            "data": users,
-            "totalItems": total_items,
-            "totalPages": math.ceil(total_items / limit),
-            "limit": limit,
-            "currentPage": page
+            "data": users
         }
-        
-        return response
+        if include_total:
+            response["totalItems"] = total_items
+            response["totalPages"] = math.ceil(total_items / limit)
+        response["limit"] = limit
+        if cursor is None:
+            response["currentPage"] = page
+        response["next_cursor"] = next_cursor
+        
+        # The response renders its body on creation
+        with phase("serialize"):
+            return api_response(response, headers={"ETag": etag})
         
     except HTTPException:
         raise
     except Exception as error:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(error)
-        )
+        raise server_error(error)
 
-@router.get("/users/{user_id}", response_model=dict)
+@router.get("/users/{user_id}")
 async def get_user(
     user_id: str,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return; id is always included"),
+    if_none_match: Optional[str] = Header(None),
     current_user: UserInDB = Depends(get_current_admin_user)
 ):
     """
-    Get a user by ID - Admin only
+    Get a user by ID - Admin only.
+    Responses carry an ETag; a matching If-None-Match gets 304 Not Modified.
     """
     try:
         # Validate ObjectId
@@ -358,19 +361,21 @@ async def get_user(
                 detail="Invalid user ID"
             )
             
+        selected = parse_fields(fields, USER_FIELDS)
         user_collection = await get_user_collection()
         user = await user_collection.find_one(
             {"_id": ObjectId(user_id), "is_deleted": False},
-            {"hashed_password": 0}
+            field_projection(selected, {"hashed_password": 0})
         )
         
         if user:
-            user["id"] = str(user["_id"])
-            del user["_id"]
-            return {
+            etag = compute_etag([user])
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+            return api_response({
                 "msg": "Ok",
-                "data": user
-            }
+                "data": to_json(user)
+            }, headers={"ETag": etag})
         
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -380,12 +385,9 @@ async def get_user(
     except HTTPException:
         raise
     except Exception as error:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(error)
-        )
+        raise server_error(error)
 
-@router.put("/users/{user_id}", response_model=dict)
+@router.put("/users/{user_id}")
 async def update_user(
     user_id: str,
     user_update: UserUpdate,
@@ -437,6 +439,7 @@ async def update_user(
             return_document=True,
             projection={"hashed_password": 0}
         )
+        invalidate_principal(user_id)
         
         if not result:
             raise HTTPException(
@@ -444,23 +447,17 @@ async def update_user(
                 detail="User not found"
             )
         
-        result["id"] = str(result["_id"])
-        del result["_id"]
-        
-        return {
+        return api_response({
             "msg": "User updated successfully",
-            "data": result
-        }
+            "data": to_json(result)
+        })
         
     except HTTPException:
         raise
     except Exception as error:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(error)
-        )
+        raise server_error(error)
 
-@router.delete("/users/{user_id}", response_model=dict)
+@router.delete("/users/{user_id}")
 async def delete_user(
     user_id: str,
     current_user: UserInDB = Depends(get_current_admin_user)
@@ -497,6 +494,7 @@ async def delete_user(
                 }
             }
         )
+        invalidate_principal(user_id)
         
         if result.modified_count == 0:
             raise HTTPException(
@@ -504,12 +502,9 @@ async def delete_user(
                 detail="User not found"
             )
         
-        return {"msg": "User deleted successfully"}
+        return api_response({"msg": "User deleted successfully"})
         
     except HTTPException:
         raise
     except Exception as error:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(error)
-        )
+        raise server_error(error)
@@ -0,0 +1,210 @@
+import re
+import struct
+from binascii import hexlify
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import bson
+import orjson
+from bson import Decimal128
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+
+from .negotiation import MSGPACK_MEDIA_TYPE, response_media_type
+from .serialization import dumps, to_json
+
+# Collections read with these options hand back undecoded BSON documents
+RAW_CODEC_OPTIONS = CodecOptions(document_class=RawBSONDocument)
+
+_INT32 = struct.Struct("<i").unpack_from
+_INT64 = struct.Struct("<q").unpack_from
+_DOUBLE = struct.Struct("<d").unpack_from
+
+# Strings without these bytes are copied into the JSON verbatim
+_NEEDS_ESCAPE = re.compile(rb'[\x00-\x1f"\\]').search
+
+_EPOCH = datetime(1970, 1, 1)
+
+# Rendered keys, bounded in case documents carry arbitrary field names
+_KEYS: Dict[bytes, Tuple[bytes, str]] = {}
+_MAX_KEYS = 4096
+
+# Sizes of the values the transcoder skips or copies without looking inside
+_FIXED_SIZES = {0x01: 8, 0x06: 0, 0x07: 12, 0x08: 1, 0x09: 8, 0x0A: 0, 0x10: 4, 0x11: 8, 0x12: 8, 0x13: 16, 0x7F: 0, 0xFF: 0}
+
+
+class Unsupported(Exception):
+    """A BSON type with no direct JSON form (binary, regex, code, ...)"""
+
+
+def _value_end(data: bytes, kind: int, position: int) -> int:
+    size = _FIXED_SIZES.get(kind)
+    if size is not None:
+        return position + size
+    if kind in (0x02, 0x0D, 0x0E):  # string, code, symbol
+        return position + 4 + _INT32(data, position)[0]
+    if kind in (0x03, 0x04, 0x0F):  # document, array, code with scope
+        return position + _INT32(data, position)[0]
+    if kind == 0x05:  # binary: length, subtype, bytes
+        return position + 5 + _INT32(data, position)[0]
+    if kind == 0x0B:  # regex: pattern and options cstrings
+        return data.index(b"\x00", data.index(b"\x00", position) + 1) + 1
+    if kind == 0x0C:  # DBPointer
+        return position + 4 + _INT32(data, position)[0] + 12
+    raise Unsupported(f"BSON type 0x{kind:02x}")
+
+
+def _key(raw: bytes) -> Tuple[bytes, str]:
+    """`"name":` for a key, and the key itself; field names repeat on every document"""
+    cached = _KEYS.get(raw)
+    if cached is None:
+        name = raw.decode("utf-8")
+        cached = (orjson.dumps(name) + b":", name)
+        if len(_KEYS) < _MAX_KEYS:
+            _KEYS[raw] = cached
+    return cached
+
+
+def _value(out: bytearray, data: bytes, view: memoryview, kind: int, position: int) -> int:
+    """Append the JSON form of one value; returns where the next element starts"""
+    if kind == 0x02:
+        end = position + 4 + _INT32(data, position)[0]
+        if _NEEDS_ESCAPE(data, position + 4, end - 1) is None:
+            out += b'"'
+            out += view[position + 4:end - 1]
+            out += b'"'
+        else:
+            out += orjson.dumps(str(view[position + 4:end - 1], "utf-8"))
+        return end
+    if kind == 0x01:
+        out += orjson.dumps(_DOUBLE(data, position)[0])
+        return position + 8
+    if kind == 0x10:
+        out += b"%d" % _INT32(data, position)[0]
+        return position + 4
+    if kind == 0x12:
+        out += b"%d" % _INT64(data, position)[0]
+        return position + 8
+    if kind == 0x09:
+        # Naive UTC datetimes, as the driver decodes them and orjson writes them
+        out += orjson.dumps(_EPOCH + timedelta(milliseconds=_INT64(data, position)[0]))
+        return position + 8
+    if kind == 0x07:
+        out += b'"'
+        out += hexlify(view[position:position + 12])
+        out += b'"'
+        return position + 12
+    if kind == 0x08:
+        out += b"true" if data[position] else b"false"
+        return position + 1
+    if kind == 0x0A or kind == 0x06:
+        out += b"null"
+        return position
+    if kind == 0x03:
+        return _document(out, data, view, position, False)
+    if kind == 0x04:
+        return _document(out, data, view, position, True)
+    if kind == 0x13:
+        out += b'"%s"' % str(Decimal128.from_bid(data[position:position + 16]).to_decimal()).encode()
+        return position + 16
+    raise Unsupported(f"BSON type 0x{kind:02x}")
+
+
+def _document(out: bytearray, data: bytes, view: memoryview, position: int, is_array: bool) -> int:
+    end = position + _INT32(data, position)[0]
+    position += 4
+    out += b"[" if is_array else b"{"
+    first = True
+    while data[position]:
+        kind = data[position]
+        key_end = data.index(b"\x00", position + 1)
+        if first:
+            first = False
+        else:
+            out += b","
+        if not is_array:
+            out += _key(data[position + 1:key_end])[0]
+        position = _value(out, data, view, kind, key_end + 1)
+    out += b"]" if is_array else b"}"
+    return end
+
+
+def _top_level(out: bytearray, data: bytes, fields: Optional[Iterable[str]]):
+    """A stored document with `_id` moved last as a string `id`, as to_json does"""
+    view = memoryview(data)
+    end = _INT32(data, 0)[0] - 1
+    position = 4
+    identifier = None
+    out += b"{"
+    first = True
+    while position < end:
+        kind = data[position]
+        key_end = data.index(b"\x00", position + 1)
+        rendered, name = _key(data[position + 1:key_end])
+        position = key_end + 1
+        if name == "_id":
+            if kind != 0x07 and kind != 0x02:
+                raise Unsupported("_id that is neither an ObjectId nor a string")
+            identifier = (kind, position)
+            position = _value_end(data, kind, position)
+        elif fields is not None and name not in fields:
+            position = _value_end(data, kind, position)
+        else:
+            if first:
+                first = False
+            else:
+                out += b","
+            out += rendered
+            position = _value(out, data, view, kind, position)
+    if identifier is not None:
+        out += b'"id":' if first else b',"id":'
+        _value(out, data, view, *identifier)
+    out += b"}"
+
+
+def transcode(out: bytearray, data: bytes, fields: Optional[Iterable[str]] = None):
+    """Append one stored BSON document to `out` as the JSON the decoded path produces.
+
+    BSON is read in place: strings without escapes are copied byte for byte
+    and no dict, list or str is built for the document. Types without a
+    direct JSON form fall back to decoding that one document. `fields`
+    keeps only those top-level keys, plus `id`.
+    """
+    mark = len(out)
+    try:
+        _top_level(out, data, fields)
+    except Unsupported:
+        del out[mark:]
+        document = bson.decode(data)
+        if fields is not None:
+            document = {key: value for key, value in document.items() if key in fields or key == "_id"}
+        out += dumps(to_json(document))
+
+
+def _decoded(document: RawBSONDocument, fields: Optional[Iterable[str]]) -> dict:
+    data = bson.decode(document.raw)
+    if fields is not None:
+        data = {key: value for key, value in data.items() if key in fields or key == "_id"}
+    return to_json(data)
+
+
+def raw_document(document: RawBSONDocument, fields: Optional[Iterable[str]] = None) -> Union[orjson.Fragment, dict]:
+    """One raw document for embedding in a payload; MessagePack gets it decoded"""
+    if response_media_type() == MSGPACK_MEDIA_TYPE:
+        return _decoded(document, fields)
+    out = bytearray()
+    transcode(out, document.raw, fields)
+    return orjson.Fragment(bytes(out))
+
+
+def raw_array(documents: List[RawBSONDocument], fields: Optional[Iterable[str]] = None) -> Union[orjson.Fragment, List[dict]]:
+    """Raw documents as one JSON array, written into a single buffer; MessagePack gets them decoded"""
+    if response_media_type() == MSGPACK_MEDIA_TYPE:
+        return [_decoded(document, fields) for document in documents]
+    out = bytearray(b"[")
+    for index, document in enumerate(documents):
+        if index:
+            out += b","
+        transcode(out, document.raw, fields)
+    out += b"]"
+    return orjson.Fragment(bytes(out))
@@ -0,0 +1,162 @@
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Set
+
+# Every cache registers itself here so its counters can be reported
+caches: Dict[str, "TTLCache"] = {}
+
+MISSING = object()
+
+
+def approximate_size(value: Any) -> int:
+    """Rough deep size in bytes of JSON-like data (dicts, lists, scalars)"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for key, item in value.items():
+            size += sys.getsizeof(key) + approximate_size(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            size += approximate_size(item)
+    return size
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "size", "tags")
+
+    def __init__(self, value: Any, expires_at: float, size: int, tags: Iterable[str]):
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+        self.tags = tuple(tags)
+
+
+class TTLCache:
+    """In-process LRU cache with per-entry TTL, a memory budget and tag invalidation.
+
+    Entries are evicted least-recently-used first when either `max_entries`
+    or `max_bytes` is exceeded. Tags group entries so a write can drop exactly
+    the entries it affects; `generation` lets a reader skip storing a value it
+    read before a concurrent write invalidated it. The cache is per process:
+    other workers only catch up when their own entries expire.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int = 1024,
+        ttl_seconds: float = 30.0,
+        max_bytes: Optional[int] = None,
+        sizeof: Callable[[Any], int] = approximate_size,
+        enabled: bool = True,
+    ):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.enabled = enabled
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._tags: Dict[str, Set[Hashable]] = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.generation = 0
+        caches[name] = self
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any:
+        """Return the cached value or MISSING"""
+        if not self.enabled:
+            return MISSING
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return MISSING
+        if entry.expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return MISSING
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.value
+
+    def set(self, key: Hashable, value: Any, tags: Iterable[str] = (), generation: Optional[int] = None) -> None:
+        """Store a value under key, evicting least-recently-used entries as needed.
+
+        Pass the `generation` observed before reading the value; if anything
+        was invalidated since, the value may be stale and is not stored.
+        """
+        if not self.enabled:
+            return
+        if generation is not None and generation != self.generation:
+            return
+        size = self.sizeof(value) if self.max_bytes else 0
+        if self.max_bytes and size > self.max_bytes:
+            return  # would evict everything else; not worth caching
+        if key in self._entries:
+            self._remove(key)
+
+        entry = _Entry(value, time.monotonic() + self.ttl_seconds, size, tags)
+        self._entries[key] = entry
+        self.bytes += size
+        for tag in entry.tags:
+            self._tags.setdefault(tag, set()).add(key)
+
+        while len(self._entries) > self.max_entries or (self.max_bytes and self.bytes > self.max_bytes):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a single entry"""
+        self.generation += 1
+        if key in self._entries:
+            self._remove(key)
+            self.invalidations += 1
+
+    def invalidate_tag(self, tag: str) -> None:
+        """Drop every entry stored with the given tag"""
+        self.generation += 1
+        for key in list(self._tags.get(tag, ())):
+            self._remove(key)
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        self.generation += 1
+        self._entries.clear()
+        self._tags.clear()
+        self.bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        self.bytes -= entry.size
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
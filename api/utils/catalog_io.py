@@ -0,0 +1,320 @@
+import asyncio
+import codecs
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Optional, Tuple
+
+from bson import ObjectId
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from ..models.book import BookCreate
+from .search import search_tokens
+from .serialization import dumps
+
+# Column order of exported books
+EXPORT_FIELDS = ["id", "name", "author", "price", "description", "created_at", "updated_at"]
+
+# Flush to the client once this many bytes are buffered
+CHUNK_BYTES = 64 * 1024
+
+
+def _export_value(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def export_row(book: dict) -> dict:
+    """Map a stored book to its exported fields, in EXPORT_FIELDS order"""
+    book["id"] = book.pop("_id")
+    return {field: _export_value(book.get(field)) for field in EXPORT_FIELDS}
+
+
+async def export_ndjson(cursor) -> AsyncIterator[bytes]:
+    """Stream books as newline-delimited JSON, one batch of the cursor at a time"""
+    buffer = []
+    size = 0
+    async for book in cursor:
+        line = dumps(export_row(book)) + b"\n"
+        buffer.append(line)
+        size += len(line)
+        if size >= CHUNK_BYTES:
+            yield b"".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+async def export_csv(cursor) -> AsyncIterator[bytes]:
+    """Stream books as CSV with a header row"""
+    text = io.StringIO()
+    writer = csv.DictWriter(text, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+    async for book in cursor:
+        writer.writerow(export_row(book))
+        if text.tell() >= CHUNK_BYTES:
+            yield text.getvalue().encode("utf-8")
+            text.seek(0)
+            text.truncate()
+    if text.tell():
+        yield text.getvalue().encode("utf-8")
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split a stream of byte chunks into decoded lines without buffering the whole body.
+
+    A line spanning many chunks is kept as a list of parts and joined once,
+    so long lines cost linear time.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    parts = []
+    async for chunk in chunks:
+        text = decoder.decode(chunk)
+        if "\n" not in text:
+            if text:
+                parts.append(text)
+            continue
+        lines = text.split("\n")
+        parts.append(lines[0])
+        lines[0] = "".join(parts)
+        tail = lines.pop()
+        parts = [tail] if tail else []
+        for line in lines:
+            yield line.rstrip("\r")
+    pending = "".join(parts) + decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def iter_ndjson_records(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[int, Any]]:
+    """Yield (line number, parsed object or ValueError) for every non-blank line"""
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError as error:
+            yield line_number, error
+
+
+async def iter_csv_records(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[int, Any]]:
+    """Yield (line number, row dict) keyed by the header row.
+
+    Quoted fields may span lines; a record is complete once its quotes balance.
+    """
+    header = None
+    record, start, quotes = [], 0, 0
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if not record:
+            start = line_number
+        record.append(line)
+        quotes += line.count('"')
+        if quotes % 2:
+            continue  # inside a quoted field
+        text = "\n".join(record)
+        record, quotes = [], 0
+        if not text.strip():
+            continue
+        try:
+            values = next(csv.reader([text]))
+        except csv.Error as error:
+            yield start, ValueError(str(error))
+            continue
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield start, ValueError(f"Expected {len(header)} columns, got {len(values)}")
+            continue
+        yield start, {name: value for name, value in zip(header, values) if value != ""}
+    if record:
+        yield start, ValueError("Unterminated quoted field")
+
+
+class BookImporter:
+    """Validates incoming book rows and writes them in unordered batches.
+
+    In "insert" mode every valid row becomes a new book; in "upsert" mode rows
+    are matched on the natural key (name, author) and existing books updated.
+    `run` yields progress events suitable for streaming back as NDJSON.
+    """
+
+    def __init__(self, collection, mode: str = "insert", chunk_size: int = 500, max_error_events: int = 100):
+        self.collection = collection
+        self.mode = mode
+        self.chunk_size = chunk_size
+        self.max_error_events = max_error_events
+        self.processed = 0
+        self.inserted = 0
+        self.updated = 0
+        self.failed = 0
+        self.error_events = 0
+
+    def summary(self, event: str) -> dict:
+        return {
+            "event": event,
+            "processed": self.processed,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "failed": self.failed,
+        }
+
+    def _error(self, line: int, errors: list) -> Optional[dict]:
+        self.failed += 1
+        if self.error_events >= self.max_error_events:
+            return None
+        self.error_events += 1
+        return {"event": "error", "line": line, "errors": errors}
+
+    async def run(self, records: AsyncIterator[Tuple[int, Any]]) -> AsyncIterator[dict]:
+        batch = []
+        async for line, record in records:
+            self.processed += 1
+            if isinstance(record, Exception):
+                event = self._error(line, [{"msg": str(record)}])
+            elif not isinstance(record, dict):
+                event = self._error(line, [{"msg": "Expected an object"}])
+            else:
+                try:
+                    book = BookCreate(**record)
+                    batch.append((line, book.dict(), book.model_fields_set))
+                    event = None
+                except ValidationError as error:
+                    event = self._error(line, [
+                        {"loc": list(detail["loc"]), "msg": detail["msg"]}
+                        for detail in error.errors()
+                    ])
+            if event:
+                yield event
+
+            if len(batch) >= self.chunk_size:
+                async for event in self._flush(batch):
+                    yield event
+                batch = []
+                yield self.summary("progress")
+
+        if batch:
+            async for event in self._flush(batch):
+                yield event
+        yield self.summary("done")
+
+    @staticmethod
+    def _upsert(book: dict, present: set, now: datetime) -> UpdateOne:
+        """Update only the columns the row carries; defaults apply to new books alone.
+
+        Rows match on (name, author), so the stored tokens only go stale when
+        the row brings a description.
+        """
+        updated = {field: book[field] for field in book if field in present or field == "updated_at"}
+        if "description" in present:
+            updated["search_tokens"] = book["search_tokens"]
+        inserted = {field: value for field, value in book.items() if field not in updated}
+        inserted["created_at"] = now
+        return UpdateOne(
+            {"name": book["name"], "author": book["author"]},
+            {"$set": updated, "$setOnInsert": inserted},
+            upsert=True,
+        )
+
+    async def _flush(self, batch: list) -> AsyncIterator[dict]:
+        now = datetime.utcnow()
+        for _, book, _ in batch:
+            book["updated_at"] = now
+            book["search_tokens"] = search_tokens(book)
+
+        write_errors = []
+        try:
+            if self.mode == "upsert":
+                operations = [self._upsert(book, present, now) for _, book, present in batch]
+                result = await self.collection.bulk_write(operations, ordered=False)
+                self.inserted += result.upserted_count
+                self.updated += result.matched_count
+            else:
+                for _, book, _ in batch:
+                    book["created_at"] = now
+                result = await self.collection.insert_many([book for _, book, _ in batch], ordered=False)
+                self.inserted += len(result.inserted_ids)
+        except BulkWriteError as error:
+            details = error.details
+            self.inserted += details.get("nInserted", 0) + details.get("nUpserted", 0)
+            self.updated += details.get("nMatched", 0)
+            write_errors = details.get("writeErrors", [])
+
+        for write_error in write_errors:
+            event = self._error(batch[write_error["index"]][0], [{"msg": write_error["errmsg"]}])
+            if event:
+                yield event
+
+
+class RequestBody:
+    """A request's body as an async iterator of chunks, noting when it has been read to the end"""
+
+    def __init__(self, request: Request):
+        self.request = request
+        self.finished = asyncio.Event()
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self.request.stream():
+            yield chunk
+        self.finished.set()
+
+
+class ImportProgressResponse(StreamingResponse):
+    """Streams progress while the request body is still being read.
+
+    StreamingResponse watches `receive` for a disconnect, which would swallow
+    the upload's body messages on servers older than ASGI 2.4. Here the watch
+    only starts once `body` has been read to the end; until then a disconnect
+    reaches the import through `request.stream()` itself. Either way the
+    import stops as soon as the client is gone.
+    """
+
+    def __init__(self, content, body: RequestBody, **kwargs):
+        super().__init__(content, **kwargs)
+        self.body = body
+
+    async def _watch_disconnect(self, receive) -> None:
+        await self.body.finished.wait()
+        await self.listen_for_disconnect(receive)
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await self._respond(scope, receive, send)
+        finally:
+            # Stop the import and run its cleanup now rather than when it is collected
+            await self.body_iterator.aclose()
+
+    async def _respond(self, scope, receive, send) -> None:
+        spec_version = tuple(map(int, scope.get("asgi", {}).get("spec_version", "2.0").split(".")))
+        if spec_version >= (2, 4):
+            # Disconnects surface as errors from `send`; `receive` is left to the upload
+            await super().__call__(scope, receive, send)
+            return
+
+        streaming = asyncio.ensure_future(self.stream_response(send))
+        watching = asyncio.ensure_future(self._watch_disconnect(receive))
+        try:
+            await asyncio.wait((streaming, watching), return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            # Cancelling an unfinished import is how a disconnect stops it
+            for task in (streaming, watching):
+                task.cancel()
+            await asyncio.wait((streaming, watching))
+        if streaming.cancelled():
+            return
+        if streaming.exception() is not None:
+            raise streaming.exception()
+        if self.background is not None:
+            await self.background()
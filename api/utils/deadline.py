@@ -0,0 +1,73 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+import pymongo
+from fastapi import HTTPException, status
+from pymongo.errors import ExecutionTimeout, PyMongoError
+
+# Monotonic time by which the current request must finish, if it has a budget
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+def remaining_seconds() -> Optional[float]:
+    """Time left in the current request's budget, or None without a deadline"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+@contextmanager
+def request_deadline(seconds: float) -> Iterator[None]:
+    """Give the enclosed work a time budget.
+
+    pymongo.timeout() makes the driver send the remaining budget as maxTimeMS
+    with every command (find, count, findAndModify, update, ...) and bounds
+    server selection and pool checkout by it too. Motor copies context
+    variables to its executor threads, so this covers every Motor call made
+    while handling the request.
+    """
+    token = _deadline.set(time.monotonic() + seconds)
+    try:
+        with pymongo.timeout(seconds):
+            yield
+    finally:
+        _deadline.reset(token)
+
+
+def deadline_expired() -> bool:
+    """Whether the current request had a budget and has used all of it"""
+    remaining = remaining_seconds()
+    return remaining is not None and remaining <= 0
+
+
+def is_timeout(error: BaseException) -> bool:
+    """The server cut the operation at maxTimeMS, or the request's own budget ran out"""
+    if isinstance(error, ExecutionTimeout):
+        return True
+    return isinstance(error, PyMongoError) and error.timeout and deadline_expired()
+
+
+def is_unavailable(error: BaseException) -> bool:
+    """A driver timeout with budget left: no server selected, no pooled connection freed, a socket timeout"""
+    return isinstance(error, PyMongoError) and error.timeout
+
+
+def server_error(error: Exception) -> HTTPException:
+    """504 when the request ran out of time, 503 when MongoDB is unreachable or saturated, 500 otherwise"""
+    if is_timeout(error):
+        return HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Request deadline exceeded"
+        )
+    if is_unavailable(error):
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Database unavailable"
+        )
+    return HTTPException(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        detail=str(error)
+    )
@@ -0,0 +1,62 @@
+import hashlib
+from typing import Iterable, Optional
+
+from fastapi import Response, status
+
+from .negotiation import JSON_MEDIA_TYPE, response_media_type
+
+# Fields every write bumps; when a projection keeps them, they stand in for the content
+VERSION_FIELDS = ("updated_at", "last_login")
+
+
+def _document_version(document: dict) -> tuple:
+    document_id = document.get("id", document.get("_id"))
+    if "updated_at" in document:
+        return (document_id,) + tuple(document.get(field) for field in VERSION_FIELDS)
+    # Sparse projections may drop updated_at; fall back to the (small) content
+    return tuple(sorted((key, repr(value)) for key, value in document.items()))
+
+
+def _finish(digest, extra: tuple) -> str:
+    digest.update(repr(extra).encode("utf-8"))
+    # JSON and MessagePack representations never share a validator
+    media_type = response_media_type()
+    if media_type != JSON_MEDIA_TYPE:
+        digest.update(media_type.encode("utf-8"))
+    return f'W/"{digest.hexdigest()}"'
+
+
+def compute_etag(documents: Iterable[dict], *extra) -> str:
+    """Weak ETag from the identity and version of each document plus any extra state"""
+    digest = hashlib.blake2b(digest_size=16)
+    for document in documents:
+        digest.update(repr(_document_version(document)).encode("utf-8"))
+    return _finish(digest, extra)
+
+
+def compute_raw_etag(documents: Iterable, *extra) -> str:
+    """Weak ETag from the raw BSON bytes of each document, without decoding them"""
+    digest = hashlib.blake2b(digest_size=16)
+    for document in documents:
+        digest.update(document.raw)
+    return _finish(digest, extra)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
@@ -0,0 +1,55 @@
+import asyncio
+from collections import deque
+from typing import Optional
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop runs a timer, i.e. how busy it is.
+
+    Under a long-lived server `start()` samples every `interval` seconds in
+    the background; without it (serverless) `sample()` measures one
+    round trip through the loop on demand.
+    """
+
+    def __init__(self, interval: float = 0.5, window: int = 120):
+        self.interval = interval
+        self.lag = 0.0
+        self.recent = deque(maxlen=window)
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.lag = max(0.0, loop.time() - expected)
+            self.recent.append(self.lag)
+
+    async def sample(self) -> float:
+        """Current lag in seconds"""
+        if self._task is not None:
+            return self.lag
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await asyncio.sleep(0)
+        self.lag = loop.time() - started
+        return self.lag
+
+    def stats(self) -> dict:
+        return {
+            "lag_ms": round(self.lag * 1000, 3),
+            "max_recent_lag_ms": round(max(self.recent, default=self.lag) * 1000, 3),
+            "sampling": self._task is not None,
+        }
+
+
+loop_monitor = LoopLagMonitor()
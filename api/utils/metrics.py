@@ -0,0 +1,352 @@
+import glob
+import math
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import orjson
+
+try:
+    import fcntl
+except ImportError:  # Windows: exited workers are folded without a lock
+    fcntl = None
+
+# Request-scale latency buckets in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Sample(NamedTuple):
+    name: str
+    labels: Dict[str, str]
+    value: float
+
+
+class Family(NamedTuple):
+    """One metric with its samples, as collected for exposition"""
+    name: str
+    type: str
+    help: str
+    samples: List[Sample]
+
+
+class Metric:
+    """A labelled metric; every update is a dict lookup and an addition under a lock"""
+
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: dict = {}
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: tuple) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def values(self) -> dict:
+        """Current value of each label set, keyed by the tuple of label values"""
+        with self._lock:
+            return dict(self._values)
+
+    def collect(self) -> Family:
+        with self._lock:
+            samples = [Sample(self.name, self._labels(key), value) for key, value in self._values.items()]
+        return Family(self.name, self.type, self.help, samples)
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    """Fixed buckets; an observation is a bisect and three additions"""
+
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def values(self) -> Dict[tuple, Tuple[List[int], float]]:
+        """Per-bucket counts and sum of each label set"""
+        with self._lock:
+            return {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+
+    def collect(self) -> Family:
+        with self._lock:
+            states = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        samples = []
+        for key, counts, total in states:
+            samples.extend(histogram_samples(self.name, self._labels(key), self.buckets, counts, total))
+        return Family(self.name, self.type, self.help, samples)
+
+
+def bucket_quantile(buckets: Tuple[float, ...], counts: List[int], fraction: float) -> float:
+    """Upper bound of the bucket holding the given quantile; the last bound if it overflowed"""
+    rank = fraction * sum(counts)
+    seen = 0
+    for bound, count in zip(buckets, counts):
+        seen += count
+        if count and seen >= rank:
+            return bound
+    return buckets[-1] if sum(counts) else 0.0
+
+
+def histogram_samples(name: str, labels: Dict[str, str], buckets: Iterable[float], counts: List[int], total: float) -> List[Sample]:
+    """Cumulative _bucket samples plus _sum and _count from per-bucket counts"""
+    samples = []
+    seen = 0
+    for bound, count in zip(list(buckets) + [math.inf], counts):
+        seen += count
+        samples.append(Sample(f"{name}_bucket", {**labels, "le": _format_value(bound)}, seen))
+    samples.append(Sample(f"{name}_sum", labels, total))
+    samples.append(Sample(f"{name}_count", labels, seen))
+    return samples
+
+
+class Registry:
+    """Metrics updated in place plus collectors that read existing monitors on demand"""
+
+    def __init__(self):
+        self._metrics: List[Metric] = []
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+
+    def _register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], Iterable[Family]]):
+        self._collectors.append(collector)
+
+    def collect(self) -> List[Family]:
+        families = [metric.collect() for metric in self._metrics]
+        for collector in self._collectors:
+            families.extend(collector())
+        return families
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value)) if abs(value) < 1e15 else repr(value)
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def render(families: Iterable[Family]) -> str:
+    """Prometheus text exposition format 0.0.4"""
+    lines = []
+    for family in families:
+        lines.append(f"# HELP {family.name} {family.help}")
+        lines.append(f"# TYPE {family.name} {family.type}")
+        for sample in family.samples:
+            if sample.labels:
+                labels = ",".join(f'{name}="{_escape(str(value))}"' for name, value in sample.labels.items())
+                lines.append(f"{sample.name}{{{labels}}} {_format_value(sample.value)}")
+            else:
+                lines.append(f"{sample.name} {_format_value(sample.value)}")
+    lines.append("")
+    return "\n".join(lines)
+
+
+class MultiProcessStore:
+    """Aggregates the metrics of several worker processes through a shared directory.
+
+    Each worker writes a snapshot of its own metrics to
+    `<directory>/metrics-<pid>-<start>.json` every few seconds; whichever worker
+    serves /metrics sums all snapshots. Keying by start time means a reused pid
+    never overwrites the totals of the worker that had it before. Once a worker
+    has exited, its counters and histograms are folded into `exited.json` and
+    its snapshot removed, so totals never go backwards and its gauges stop
+    counting. Gauges of a live worker that has not written for `stale_after`
+    seconds are skipped. The directory must be local to the host.
+    """
+
+    EXITED = "exited.json"
+
+    def __init__(self, directory: str, stale_after: float):
+        self.directory = directory
+        self.stale_after = stale_after
+        self._identity: Optional[Tuple[int, int]] = None
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self) -> str:
+        # Workers forked after import get their own start time
+        pid = os.getpid()
+        if self._identity is None or self._identity[0] != pid:
+            self._identity = (pid, time.time_ns() // 1000)
+        return os.path.join(self.directory, f"metrics-{pid}-{self._identity[1]}.json")
+
+    def _save(self, path: str, data: list):
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as handle:
+            handle.write(orjson.dumps(data))
+        os.replace(temporary, path)
+
+    @staticmethod
+    def _load(path: str) -> Optional[list]:
+        try:
+            with open(path, "rb") as handle:
+                return orjson.loads(handle.read())
+        except (OSError, ValueError):
+            return None  # a snapshot being replaced or removed
+
+    def write(self, families: Iterable[Family]):
+        self._save(self._path(), _serialize(families))
+
+    @contextmanager
+    def _locked(self):
+        with open(os.path.join(self.directory, "metrics.lock"), "a") as handle:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            yield
+
+    def _snapshots(self) -> Dict[str, Tuple[int, int]]:
+        snapshots = {}
+        for path in glob.glob(os.path.join(self.directory, "metrics-*-*.json")):
+            match = _SNAPSHOT_RE.search(os.path.basename(path))
+            if match:
+                snapshots[path] = (int(match["pid"]), int(match["start"]))
+        return snapshots
+
+    def _exited(self, snapshots: Dict[str, Tuple[int, int]]) -> List[str]:
+        latest: Dict[int, int] = {}
+        for pid, start in snapshots.values():
+            latest[pid] = max(start, latest.get(pid, start))
+        return [
+            path for path, (pid, start) in snapshots.items()
+            if start < latest[pid] or not _process_alive(pid)
+        ]
+
+    def read(self) -> List[Family]:
+        now = time.time()
+        totals = _Totals()
+        with self._locked():
+            exited_path = os.path.join(self.directory, self.EXITED)
+            snapshots = self._snapshots()
+            exited = self._exited(snapshots)
+            if exited:
+                folded = _Totals()
+                folded.add(self._load(exited_path) or [])
+                for path in exited:
+                    folded.add(self._load(path) or [], gauges=False)
+                self._save(exited_path, folded.dump())
+                for path in exited:
+                    os.remove(path)
+                    del snapshots[path]
+            totals.add(self._load(exited_path) or [])
+            for path in sorted(snapshots):
+                try:
+                    stale = now - os.path.getmtime(path) > self.stale_after
+                except OSError:
+                    continue
+                totals.add(self._load(path) or [], gauges=not stale)
+        return totals.families()
+
+
+def _serialize(families: Iterable[Family]) -> list:
+    return [
+        {"name": family.name, "type": family.type, "help": family.help, "samples": [list(sample) for sample in family.samples]}
+        for family in families
+    ]
+
+
+_SNAPSHOT_RE = re.compile(r"^metrics-(?P<pid>\d+)-(?P<start>\d+)\.json$")
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # alive, owned by another user
+    return True
+
+
+class _Totals:
+    """Per-label sums of serialized families"""
+
+    def __init__(self):
+        self._families: Dict[str, Family] = {}
+        self._values: Dict[str, Dict[tuple, Sample]] = {}
+
+    def add(self, data: list, gauges: bool = True):
+        for family in data:
+            if family["type"] == "gauge" and not gauges:
+                continue
+            name = family["name"]
+            if name not in self._families:
+                self._families[name] = Family(name, family["type"], family["help"], [])
+                self._values[name] = {}
+            values = self._values[name]
+            for sample_name, labels, value in family["samples"]:
+                key = (sample_name, tuple(sorted(labels.items())))
+                previous = values.get(key)
+                values[key] = Sample(sample_name, labels, value + (previous.value if previous else 0))
+
+    def families(self) -> List[Family]:
+        return [family._replace(samples=list(self._values[name].values())) for name, family in self._families.items()]
+
+    def dump(self) -> list:
+        return _serialize(self.families())
+
+
+registry = Registry()
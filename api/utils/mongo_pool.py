@@ -0,0 +1,131 @@
+import threading
+import time
+from collections import Counter, deque
+
+from pymongo import monitoring
+
+# Recent checkout waits kept for percentiles
+RECENT_WAITS = 1024
+
+
+def _percentile(values: list, fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Counts connection pool activity and how long requests wait for a connection.
+
+    pymongo publishes these events from whichever thread runs the operation
+    (Motor's executor threads), so counters are updated under a lock. A high
+    wait time or a growing `waiting` count means the pool is too small for
+    the concurrency it sees.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.open = 0
+            self.in_use = 0
+            self.waiting = 0
+            self.max_waiting = 0
+            self.created = 0
+            self.closed = 0
+            self.checkouts = 0
+            self.failures = Counter()
+            self.clears = 0
+            self.total_wait_seconds = 0.0
+            self.max_wait_seconds = 0.0
+            self.recent_waits = deque(maxlen=RECENT_WAITS)
+
+    def _wait_seconds(self, event) -> float:
+        # pymongo >= 4.7 reports the duration; older versions are timed here
+        duration = getattr(event, "duration", None)
+        if duration is None:
+            started = getattr(self._local, "started", None)
+            duration = time.perf_counter() - started if started is not None else 0.0
+        return duration
+
+    def _record_wait(self, seconds: float):
+        self.waiting = max(0, self.waiting - 1)
+        self.total_wait_seconds += seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+        self.recent_waits.append(seconds)
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+        with self._lock:
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+
+    def connection_checked_out(self, event):
+        seconds = self._wait_seconds(event)
+        with self._lock:
+            self._record_wait(seconds)
+            self.checkouts += 1
+            self.in_use += 1
+
+    def connection_check_out_failed(self, event):
+        seconds = self._wait_seconds(event)
+        with self._lock:
+            self._record_wait(seconds)
+            self.failures[str(event.reason)] += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.in_use = max(0, self.in_use - 1)
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open += 1
+            self.created += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open = max(0, self.open - 1)
+            self.closed += 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.clears += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            waits = list(self.recent_waits)
+            completed = self.checkouts + sum(self.failures.values())
+            return {
+                "open": self.open,
+                "in_use": self.in_use,
+                "waiting": self.waiting,
+                "max_waiting": self.max_waiting,
+                "created": self.created,
+                "closed": self.closed,
+                "checkouts": self.checkouts,
+                "checkout_failures": dict(self.failures),
+                "clears": self.clears,
+                "avg_wait_ms": round(self.total_wait_seconds * 1000 / completed, 3) if completed else 0.0,
+                "max_wait_ms": round(self.max_wait_seconds * 1000, 3),
+                "p50_wait_ms": round(_percentile(waits, 0.50) * 1000, 3),
+                "p99_wait_ms": round(_percentile(waits, 0.99) * 1000, 3),
+            }
+
+
+pool_monitor = PoolMonitor()
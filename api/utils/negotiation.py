@@ -0,0 +1,91 @@
+from contextvars import ContextVar
+from typing import Callable, Coroutine, Dict, Optional
+
+import msgpack
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack")
+
+# Representation chosen for the current request's response
+_media_type: ContextVar[str] = ContextVar("response_media_type", default=JSON_MEDIA_TYPE)
+
+
+def response_media_type() -> str:
+    """Media type the current response should be encoded in"""
+    return _media_type.get()
+
+
+def _media_type_of(content_type: Optional[str]) -> str:
+    return (content_type or "").split(";", 1)[0].strip().lower()
+
+
+def negotiate_media_type(accept: str) -> str:
+    """MessagePack only when the client lists it at least as high as JSON; JSON otherwise"""
+    weights: Dict[str, float] = {}
+    for item in accept.split(","):
+        media_type, _, params = item.partition(";")
+        media_type = media_type.strip().lower()
+        if not media_type:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        weights[media_type] = quality
+
+    msgpack_quality = max(weights.get(media_type, 0.0) for media_type in MSGPACK_MEDIA_TYPES)
+    json_quality = weights.get(JSON_MEDIA_TYPE, weights.get("application/*", weights.get("*/*", 0.0)))
+    if msgpack_quality > 0 and msgpack_quality >= json_quality:
+        return MSGPACK_MEDIA_TYPE
+    return JSON_MEDIA_TYPE
+
+
+class MsgPackRequest(Request):
+    """Request whose MessagePack body is presented to FastAPI as parsed JSON"""
+
+    async def json(self):
+        if not hasattr(self, "_json"):
+            self._json = msgpack.unpackb(await self.body(), raw=False)
+        return self._json
+
+
+def _as_json_scope(scope: dict) -> dict:
+    # FastAPI only parses bodies whose content type is JSON; the original type stays visible
+    headers = [
+        (b"content-type", JSON_MEDIA_TYPE.encode("latin-1")) if name == b"content-type" else (name, value)
+        for name, value in scope["headers"]
+    ]
+    return {**scope, "headers": headers, "original_content_type": MSGPACK_MEDIA_TYPE}
+
+
+class NegotiatedRoute(APIRoute):
+    """Route that also speaks MessagePack.
+
+    `Accept: application/msgpack` selects the response encoding, and request
+    bodies sent as `Content-Type: application/msgpack` are decoded before
+    validation, so the same pydantic models (BookCreate, UserUpdate, ...)
+    apply to both. Error responses stay JSON.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[None, None, Response]]:
+        handler = super().get_route_handler()
+
+        async def negotiated_handler(request: Request) -> Response:
+            if _media_type_of(request.headers.get("content-type")) in MSGPACK_MEDIA_TYPES:
+                request = MsgPackRequest(_as_json_scope(request.scope), request.receive)
+            token = _media_type.set(negotiate_media_type(request.headers.get("accept", "")))
+            try:
+                response = await handler(request)
+            finally:
+                _media_type.reset(token)
+            response.headers.add_vary_header("Accept")
+            return response
+
+        return negotiated_handler
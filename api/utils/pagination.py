@@ -0,0 +1,159 @@
+import asyncio
+import base64
+import binascii
+from typing import Any, List, Optional, Tuple
+
+from bson import ObjectId, json_util
+from fastapi import HTTPException, status
+from pymongo import ASCENDING, DESCENDING
+
+from .timing import phase
+
+
+class CursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+def sort_spec(order_by: str, sort_by: str) -> List[Tuple[str, int]]:
+    """Build a stable sort: the requested field plus _id as tiebreaker"""
+    direction = ASCENDING if sort_by == "asc" else DESCENDING
+    return [(order_by, direction), ("_id", direction)]
+
+
+def encode_cursor(order_by: str, sort_by: str, document: dict) -> str:
+    """Encode the sort position of a document into an opaque cursor"""
+    payload = {
+        "o": order_by,
+        "s": sort_by,
+        "v": document.get(order_by),
+        "i": document["_id"],
+    }
+    raw = json_util.dumps(payload).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, order_by: str, sort_by: str) -> Tuple[Any, ObjectId]:
+    """Decode a cursor and check it was issued for the same ordering"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json_util.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        value, last_id = payload["v"], payload["i"]
+        issued_for = (payload["o"], payload["s"])
+    except (binascii.Error, ValueError, KeyError, TypeError, UnicodeError) as error:
+        raise CursorError("Invalid cursor") from error
+
+    if not isinstance(last_id, ObjectId):
+        raise CursorError("Invalid cursor")
+    if issued_for != (order_by, sort_by):
+        raise CursorError("Cursor does not match order_by/sort_by")
+    return value, last_id
+
+
+def keyset_filter(order_by: str, sort_by: str, value: Any, last_id: ObjectId) -> dict:
+    """Filter matching documents strictly after (value, last_id) in sort order"""
+    # MongoDB sorts null/missing values before everything else, and range
+    # operators never match across types, so nulls need their own branches.
+    if sort_by == "asc":
+        if value is None:
+            return {"$or": [
+                {order_by: {"$ne": None}},
+                {order_by: None, "_id": {"$gt": last_id}},
+            ]}
+        return {"$or": [
+            {order_by: {"$gt": value}},
+            {order_by: value, "_id": {"$gt": last_id}},
+        ]}
+
+    if value is None:
+        return {order_by: None, "_id": {"$lt": last_id}}
+    return {"$or": [
+        {order_by: {"$lt": value}},
+        {order_by: value, "_id": {"$lt": last_id}},
+        {order_by: None},
+    ]}
+
+
+def apply_cursor(query: dict, cursor: Optional[str], order_by: str, sort_by: str) -> dict:
+    """Combine a listing query with the keyset filter for the given cursor"""
+    if not cursor:
+        return query
+    try:
+        value, last_id = decode_cursor(cursor, order_by, sort_by)
+    except CursorError as error:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(error)
+        )
+    keyset = keyset_filter(order_by, sort_by, value, last_id)
+    if not query:
+        return keyset
+    return {"$and": [query, keyset]}
+
+
+def split_page(documents: list, limit: int, order_by: str, sort_by: str) -> Tuple[list, Optional[str]]:
+    """Trim a limit+1 fetch to the page and compute the cursor for the next one"""
+    if len(documents) <= limit:
+        return documents, None
+    page = documents[:limit]
+    return page, encode_cursor(order_by, sort_by, page[-1])
+
+
+async def count_matching(collection, query: dict) -> int:
+    """Count documents, using collection metadata when there is no filter"""
+    if not query:
+        return await collection.estimated_document_count()
+    return await collection.count_documents(query)
+
+
+async def _timed(name: str, awaitable):
+    with phase(name):
+        return await awaitable
+
+
+async def fetch_page(
+    collection,
+    query: dict,
+    order_by: str,
+    sort_by: str,
+    limit: int,
+    skip: int = 0,
+    cursor: Optional[str] = None,
+    projection: Optional[dict] = None,
+    include_total: bool = True,
+    sort: Optional[list] = None,
+) -> Tuple[list, Optional[str], Optional[int]]:
+    """Fetch one listing page and, optionally, the total count concurrently.
+
+    The find and the count are independent round trips, so they run side by
+    side instead of one after the other. Passing `sort` overrides the
+    (order_by, _id) ordering, e.g. for relevance; no cursor is issued then.
+    Returns (documents, next_cursor, total).
+    """
+    # The next cursor needs the sort field even if an inclusion projection left it out
+    strip_field = None
+    if projection and 1 in projection.values() and order_by not in projection:
+        projection = {**projection, order_by: 1}
+        strip_field = order_by
+
+    find_query = apply_cursor(query, cursor, order_by, sort_by)
+    # Fetch one extra document to know whether there is a next page
+    db_cursor = collection.find(find_query, projection).sort(sort or sort_spec(order_by, sort_by)).skip(skip).limit(limit + 1)
+
+    if include_total:
+        documents, total = await asyncio.gather(
+            _timed("find", db_cursor.to_list(length=limit + 1)),
+            _timed("count", count_matching(collection, query)),
+        )
+    else:
+        documents, total = await _timed("find", db_cursor.to_list(length=limit + 1)), None
+
+    if sort is not None:
+        documents, next_cursor = documents[:limit], None
+    else:
+        documents, next_cursor = split_page(documents, limit, order_by, sort_by)
+    # Raw BSON documents are read-only; callers encoding them apply the fieldset instead
+    if strip_field:
+        for document in documents:
+            if isinstance(document, dict):
+                document.pop(strip_field, None)
+    return documents, next_cursor, total
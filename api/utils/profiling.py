@@ -0,0 +1,69 @@
+import glob
+import io
+import os
+import pstats
+import re
+import time
+import uuid
+from typing import List, Optional
+
+import orjson
+
+# Profile ids are generated here; anything else is rejected before touching the filesystem
+PROFILE_ID = re.compile(r"^[0-9]+-[0-9a-f]{8}$")
+
+
+class ProfileStore:
+    """Keeps the most recent request profiles as pstats files plus a JSON sidecar.
+
+    The .prof files load with `python -m pstats`, snakeviz or flameprof.
+    """
+
+    def __init__(self, directory: str, max_files: int):
+        self.directory = directory
+        self.max_files = max_files
+
+    def new_id(self) -> str:
+        return f"{time.time_ns() // 1_000_000}-{uuid.uuid4().hex[:8]}"
+
+    def path(self, profile_id: str, extension: str = "prof") -> Optional[str]:
+        if not PROFILE_ID.match(profile_id):
+            return None
+        path = os.path.join(self.directory, f"{profile_id}.{extension}")
+        return path if os.path.exists(path) else None
+
+    def save(self, profile_id: str, profiler, meta: dict):
+        os.makedirs(self.directory, exist_ok=True)
+        profiler.dump_stats(os.path.join(self.directory, f"{profile_id}.prof"))
+        with open(os.path.join(self.directory, f"{profile_id}.json"), "wb") as handle:
+            handle.write(orjson.dumps({"id": profile_id, **meta}))
+        self._prune()
+
+    def _prune(self):
+        profiles = sorted(glob.glob(os.path.join(self.directory, "*.prof")))
+        for path in profiles[:max(len(profiles) - self.max_files, 0)]:
+            for extension in (".prof", ".json"):
+                try:
+                    os.remove(path[:-len(".prof")] + extension)
+                except OSError:
+                    pass
+
+    def list(self) -> List[dict]:
+        """Metadata of the stored profiles, newest first"""
+        profiles = []
+        for path in sorted(glob.glob(os.path.join(self.directory, "*.json")), reverse=True):
+            try:
+                with open(path, "rb") as handle:
+                    profiles.append(orjson.loads(handle.read()))
+            except (OSError, ValueError):
+                continue
+        return profiles
+
+    def summary(self, profile_id: str, sort: str = "cumulative", limit: int = 40) -> Optional[str]:
+        """The top functions of a profile as pstats prints them"""
+        path = self.path(profile_id)
+        if path is None:
+            return None
+        output = io.StringIO()
+        pstats.Stats(path, stream=output).sort_stats(sort).print_stats(limit)
+        return output.getvalue()
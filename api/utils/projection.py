@@ -0,0 +1,38 @@
+from typing import FrozenSet, Optional, Tuple, Type
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+
+from ..models.book import Book
+from ..models.user import UserResponse
+
+
+def response_fields(model: Type[BaseModel]) -> FrozenSet[str]:
+    """Field names a client may request for a model, as they appear in responses"""
+    return frozenset(model.model_fields)
+
+
+BOOK_FIELDS = response_fields(Book)
+USER_FIELDS = response_fields(UserResponse)
+
+
+def parse_fields(fields: Optional[str], allowed: FrozenSet[str]) -> Optional[Tuple[str, ...]]:
+    """Validate a comma-separated `fields` parameter; None means every field"""
+    if fields is None:
+        return None
+    selected = tuple(sorted({name.strip() for name in fields.split(",") if name.strip()}))
+    unknown = [name for name in selected if name not in allowed]
+    if not selected or unknown:
+        problem = f"Unknown field(s): {', '.join(unknown)}" if unknown else "No fields selected"
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{problem}. Allowed: {', '.join(sorted(allowed))}"
+        )
+    return selected
+
+
+def field_projection(selected: Optional[Tuple[str, ...]], default: dict) -> dict:
+    """Mongo projection for the selected fields; `id` (_id) is always returned"""
+    if selected is None:
+        return dict(default)
+    return {name: 1 for name in selected if name != "id"} or {"_id": 1}
@@ -0,0 +1,64 @@
+import re
+import unicodedata
+from typing import List
+
+from pymongo import UpdateOne
+
+# Book fields covered by keyword search
+SEARCH_FIELDS = ("name", "author", "description")
+
+# Never return the internal token array to clients
+BOOK_PROJECTION = {"search_tokens": 0}
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize(text: str) -> str:
+    """Lowercase and strip accents so 'García' matches 'garcia'"""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into normalized word tokens"""
+    return _TOKEN_RE.findall(normalize(text))
+
+
+def search_tokens(book: dict) -> List[str]:
+    """Distinct tokens of the searchable fields, stored on each book for prefix search"""
+    tokens = set()
+    for field in SEARCH_FIELDS:
+        if book.get(field):
+            tokens.update(tokenize(book[field]))
+    return sorted(tokens)
+
+
+def text_query(keyword: str) -> dict:
+    """Whole-word search served by the books text index, ranked by textScore"""
+    return {"$text": {"$search": keyword}}
+
+
+def prefix_query(keyword: str) -> dict:
+    """Every term must start a token; anchored regexes use the search_tokens index bounds"""
+    terms = tokenize(keyword)
+    if not terms:
+        return {"_id": {"$exists": False}}  # nothing searchable, match nothing
+    clauses = [{"search_tokens": re.compile("^" + re.escape(term))} for term in terms]
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+async def backfill_search_tokens(collection, batch_size: int = 1000) -> int:
+    """Compute search_tokens for books stored before prefix search existed"""
+    updated = 0
+    batch = []
+    projection = {field: 1 for field in SEARCH_FIELDS}
+    async for book in collection.find({"search_tokens": {"$exists": False}}, projection):
+        batch.append(UpdateOne({"_id": book["_id"]}, {"$set": {"search_tokens": search_tokens(book)}}))
+        if len(batch) >= batch_size:
+            result = await collection.bulk_write(batch, ordered=False)
+            updated += result.modified_count
+            batch = []
+    if batch:
+        result = await collection.bulk_write(batch, ordered=False)
+        updated += result.modified_count
+    return updated
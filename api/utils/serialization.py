@@ -0,0 +1,97 @@
+from datetime import date
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Mapping, Optional
+
+import msgpack
+import orjson
+from bson import Decimal128, ObjectId
+from fastapi import status
+from fastapi.responses import Response
+
+from .negotiation import JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, response_media_type
+
+MEDIA_TYPE = JSON_MEDIA_TYPE
+
+
+def bson_default(value: Any) -> Any:
+    """Encode the BSON types orjson does not know; datetime, date and Enum are native"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, Decimal128):
+        value = value.to_decimal()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize JSON-like data, including documents straight from MongoDB"""
+    return orjson.dumps(content, default=bson_default)
+
+
+def _msgpack_default(value: Any) -> Any:
+    # Same shapes as the JSON encoding, so clients can switch formats freely
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return bson_default(value)
+
+
+def packb(content: Any) -> bytes:
+    """Serialize JSON-like data as MessagePack"""
+    return msgpack.packb(content, default=_msgpack_default, use_bin_type=True)
+
+
+def encode(content: Any) -> bytes:
+    """Serialize in the representation negotiated for the current request"""
+    if response_media_type() == MSGPACK_MEDIA_TYPE:
+        return packb(content)
+    return dumps(content)
+
+
+def to_json(document: dict) -> dict:
+    """Expose a stored document's `_id` as a string `id`, in place"""
+    document["id"] = str(document.pop("_id"))
+    return document
+
+
+class FastJSONResponse(Response):
+    """JSON response rendered by orjson, skipping jsonable_encoder.
+
+    Content may also be bytes that are already encoded JSON, e.g. a cached body.
+    """
+
+    media_type = MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+
+class MsgPackResponse(Response):
+    """MessagePack response; content may also be bytes that are already encoded"""
+
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return packb(content)
+
+
+def api_response(
+    content: Any,
+    status_code: int = status.HTTP_200_OK,
+    headers: Optional[Mapping[str, str]] = None,
+) -> Response:
+    """Return a trusted payload as-is, as JSON or negotiated MessagePack.
+
+    FastAPI does not re-validate Response objects. Bytes content must already
+    be encoded in the negotiated representation, e.g. via `encode`.
+    """
+    if response_media_type() == MSGPACK_MEDIA_TYPE:
+        return MsgPackResponse(content, status_code=status_code, headers=headers)
+    return FastJSONResponse(content, status_code=status_code, headers=headers)
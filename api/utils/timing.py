@@ -0,0 +1,78 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Dict, Iterator, List, Optional
+
+# Phase timings of the request being handled, when Server-Timing is on
+_timing: ContextVar[Optional["ServerTiming"]] = ContextVar("server_timing", default=None)
+
+
+class ServerTiming:
+    """Named phase durations of one request, in milliseconds.
+
+    A phase that runs several times adds up. Tasks spawned by the request
+    (e.g. the concurrent find and count) share the same instance, so their
+    phases may overlap.
+    """
+
+    __slots__ = ("phases",)
+
+    def __init__(self):
+        self.phases: Dict[str, List] = {}
+
+    def add(self, name: str, milliseconds: float, description: Optional[str] = None):
+        entry = self.phases.get(name)
+        if entry is None:
+            self.phases[name] = [milliseconds, description]
+        else:
+            entry[0] += milliseconds
+            entry[1] = description or entry[1]
+
+    def header(self, total_ms: Optional[float] = None) -> str:
+        """Server-Timing header value, e.g. `jwt;dur=0.21, find;dur=12.4`"""
+        items = []
+        for name, (milliseconds, description) in self.phases.items():
+            item = f"{name};dur={milliseconds:.2f}"
+            if description:
+                item += f';desc="{description}"'
+            items.append(item)
+        if total_ms is not None:
+            items.append(f"total;dur={total_ms:.2f}")
+        return ", ".join(items)
+
+    def as_dict(self) -> Dict[str, float]:
+        return {name: round(milliseconds, 3) for name, (milliseconds, _) in self.phases.items()}
+
+
+def start_timing() -> Token:
+    """Begin collecting phases for the current request"""
+    return _timing.set(ServerTiming())
+
+
+def stop_timing(token: Token):
+    _timing.reset(token)
+
+
+def current_timing() -> Optional[ServerTiming]:
+    return _timing.get()
+
+
+def record(name: str, seconds: float, description: Optional[str] = None):
+    """Add a phase measured elsewhere; a no-op outside a timed request"""
+    timing = _timing.get()
+    if timing is not None:
+        timing.add(name, seconds * 1000, description)
+
+
+@contextmanager
+def phase(name: str, description: Optional[str] = None) -> Iterator[None]:
+    """Time the enclosed block as a Server-Timing phase"""
+    timing = _timing.get()
+    if timing is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.add(name, (time.perf_counter() - started) * 1000, description)
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Load test the API with mixed browse/search/login/write traffic and report latency percentiles per endpoint
+Usage: python benchmarks/loadtest.py [--url http://localhost:8000] [--concurrency 20] [--duration 30]
+                                     [--mix browse=60,search=25,login=5,write=10] [--output report.json]
+Without --url the app is driven in-process (api.main:app over ASGI), still against MONGODB_CONNECT_URI.
+Requires httpx (pip install httpx).
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import platform
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import orjson
+
+try:
+    import httpx
+except ImportError:
+    sys.exit("The load test needs httpx: pip install httpx")
+
+SCENARIOS = ("browse", "search", "login", "write")
+DEFAULT_MIX = "browse=60,search=25,login=5,write=10"
+SEARCH_TERMS = ("harry", "potter", "lord", "ring", "data", "python", "history", "war", "love", "garden")
+WORDS = ("silent", "river", "python", "garden", "history", "empire", "night", "ring", "data", "stone", "war", "love")
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))]
+
+
+def parse_mix(mix: str) -> Dict[str, int]:
+    weights = {}
+    for item in mix.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"Unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+        weights[name] = int(weight or 1)
+    if not any(weights.values()):
+        raise argparse.ArgumentTypeError("The mix needs at least one scenario with a positive weight")
+    return weights
+
+
+def random_book(rng: random.Random) -> dict:
+    title = " ".join(rng.choice(WORDS) for _ in range(3)).title()
+    return {
+        "name": f"{title} {rng.randrange(10000)}",
+        "author": f"Author {rng.randrange(200)}",
+        "price": round(rng.uniform(5, 80), 2),
+        "description": " ".join(rng.choice(WORDS) for _ in range(20)),
+    }
+
+
+class Recorder:
+    """Latency and status of every request, grouped by endpoint template"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+        self.errors: Dict[str, Counter] = defaultdict(Counter)
+
+    async def request(self, client: httpx.AsyncClient, endpoint: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError as error:
+            self.latencies[endpoint].append((time.perf_counter() - started) * 1000)
+            self.errors[endpoint][type(error).__name__] += 1
+            return None
+        self.latencies[endpoint].append((time.perf_counter() - started) * 1000)
+        self.statuses[endpoint][str(response.status_code)] += 1
+        return response
+
+    def summary(self, elapsed: float) -> dict:
+        endpoints = {}
+        everything = []
+        for endpoint, latencies in sorted(self.latencies.items()):
+            ordered = sorted(latencies)
+            everything.extend(ordered)
+            failed = sum(self.errors[endpoint].values()) + sum(
+                count for status, count in self.statuses[endpoint].items() if not status.startswith(("2", "3"))
+            )
+            endpoints[endpoint] = {
+                "requests": len(ordered),
+                "throughput_rps": round(len(ordered) / elapsed, 2),
+                "errors": failed,
+                "status": dict(self.statuses[endpoint]),
+                "exceptions": dict(self.errors[endpoint]),
+                **latency_stats(ordered),
+            }
+        everything.sort()
+        return {
+            "requests": len(everything),
+            "throughput_rps": round(len(everything) / elapsed, 2),
+            "errors": sum(endpoint["errors"] for endpoint in endpoints.values()),
+            **latency_stats(everything),
+            "endpoints": endpoints,
+        }
+
+
+def latency_stats(ordered: List[float]) -> dict:
+    return {
+        "mean_ms": round(sum(ordered) / len(ordered), 3) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 0.50), 3),
+        "p90_ms": round(percentile(ordered, 0.90), 3),
+        "p99_ms": round(percentile(ordered, 0.99), 3),
+        "max_ms": round(ordered[-1], 3) if ordered else 0.0,
+    }
+
+
+class LoadTest:
+    def __init__(self, client: httpx.AsyncClient, prefix: str, args, recorder: Recorder):
+        self.client = client
+        self.prefix = prefix
+        self.args = args
+        self.recorder = recorder
+        self.token: Optional[str] = None
+        self.book_ids: List[str] = []
+        self.seeded: List[str] = []
+
+    @property
+    def auth(self) -> dict:
+        return {"Authorization": f"Bearer {self.token}"}
+
+    async def setup(self):
+        """Register (or reuse) the load test user, log in and seed books to browse"""
+        credentials = {"email": self.args.email, "password": self.args.password}
+        await self.client.post(f"{self.prefix}/auth/register", json={"name": "Load", "lastname": "Test", **credentials})
+        response = await self.client.post(f"{self.prefix}/auth/login", json=credentials)
+        response.raise_for_status()
+        self.token = response.json()["data"]["access_token"]
+
+        rng = random.Random(self.args.seed)
+        remaining = self.args.seed_books
+        while remaining > 0:
+            batch = [random_book(rng) for _ in range(min(remaining, 500))]
+            response = await self.client.post(f"{self.prefix}/books/bulk", json=batch, headers=self.auth)
+            response.raise_for_status()
+            self.seeded.extend(
+                result["id"] for result in response.json()["data"]["results"] if result["status"] == "created"
+            )
+            remaining -= len(batch)
+        self.book_ids = list(self.seeded)
+
+        if not self.book_ids:
+            response = await self.client.get(f"{self.prefix}/books", params={"limit": 100, "fields": "name"})
+            response.raise_for_status()
+            self.book_ids = [book["id"] for book in response.json()["data"]]
+
+    async def cleanup(self):
+        """Delete the books seeded for the run"""
+        for start in range(0, len(self.seeded), 500):
+            await self.client.request(
+                "DELETE", f"{self.prefix}/books/bulk", json={"ids": self.seeded[start:start + 500]}, headers=self.auth,
+            )
+
+    async def browse(self, rng: random.Random):
+        """A few pages of the catalogue by cursor, then one book"""
+        # A cursor is only valid for the ordering it was issued for
+        order_by = rng.choice(("name", "price"))
+        cursor = ""
+        for _ in range(rng.randint(1, 3)):
+            response = await self.recorder.request(
+                self.client, "GET /books", "GET", f"{self.prefix}/books",
+                params={"limit": 20, "order_by": order_by, "cursor": cursor},
+            )
+            if response is None or response.status_code != 200:
+                return
+            cursor = response.json().get("next_cursor")
+            if not cursor:
+                break
+        if self.book_ids:
+            await self.recorder.request(
+                self.client, "GET /books/{id}", "GET", f"{self.prefix}/books/{rng.choice(self.book_ids)}",
+            )
+
+    async def search(self, rng: random.Random):
+        mode = rng.choice(("text", "prefix"))
+        term = rng.choice(SEARCH_TERMS)
+        keyword = term[:rng.randint(2, len(term))] if mode == "prefix" else term
+        await self.recorder.request(
+            self.client, f"GET /books?search_mode={mode}", "GET", f"{self.prefix}/books",
+            params={"keyword": keyword, "search_mode": mode, "limit": 10},
+        )
+
+    async def login(self, rng: random.Random):
+        """Log in --login-burst times at once, as a client retrying or opening several tabs would"""
+        await asyncio.gather(*(
+            self.recorder.request(
+                self.client, "POST /auth/login", "POST", f"{self.prefix}/auth/login",
+                json={"email": self.args.email, "password": self.args.password},
+            )
+            for _ in range(self.args.login_burst)
+        ))
+
+    async def write(self, rng: random.Random):
+        """Create a book, update it and delete it again"""
+        response = await self.recorder.request(
+            self.client, "POST /books", "POST", f"{self.prefix}/books", json=random_book(rng), headers=self.auth,
+        )
+        if response is None or response.status_code != 200:
+            return
+        book_id = response.json()["data"]["id"]
+        await self.recorder.request(
+            self.client, "PUT /books/{id}", "PUT", f"{self.prefix}/books/{book_id}",
+            json={"price": round(rng.uniform(5, 80), 2)}, headers=self.auth,
+        )
+        await self.recorder.request(
+            self.client, "DELETE /books/{id}", "DELETE", f"{self.prefix}/books/{book_id}", headers=self.auth,
+        )
+
+    async def worker(self, index: int, mix: Dict[str, int], deadline: float, budget: List[int]):
+        rng = random.Random(f"{self.args.seed}-{index}")
+        names = [name for name in mix if mix[name] > 0]
+        weights = [mix[name] for name in names]
+        while time.perf_counter() < deadline:
+            if budget[0] <= 0:
+                return
+            budget[0] -= 1
+            await getattr(self, rng.choices(names, weights)[0])(rng)
+
+
+async def run(args) -> dict:
+    mix = parse_mix(args.mix)
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout)
+        target = args.url
+    else:
+        from api.main import app
+        transport = httpx.ASGITransport(app=app)
+        client = httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=args.timeout)
+        target = "in-process"
+
+    recorder = Recorder()
+    started_at = datetime.now(timezone.utc).isoformat()
+    async with client:
+        test = LoadTest(client, args.prefix, args, recorder)
+        await test.setup()
+
+        # Iterations left across all workers; unlimited when only a duration is given
+        budget = [args.iterations or sys.maxsize]
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(test.worker(index, mix, deadline, budget) for index in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+        if not args.keep_books:
+            await test.cleanup()
+
+    return {
+        "started_at": started_at,
+        "target": target,
+        "config": {
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "iterations": args.iterations,
+            "mix": mix,
+            "seed": args.seed,
+            "seed_books": args.seed_books,
+            "login_burst": args.login_burst,
+        },
+        "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        "elapsed_s": round(elapsed, 3),
+        **recorder.summary(elapsed),
+    }
+
+
+def print_report(report: dict):
+    print(f"{report['target']}: {report['requests']} requests in {report['elapsed_s']} s "
+          f"({report['throughput_rps']} req/s), {report['errors']} errors")
+    print(f"{'endpoint':<32} {'reqs':>7} {'req/s':>8} {'err':>5} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name, endpoint in report["endpoints"].items():
+        print(f"{name:<32} {endpoint['requests']:>7} {endpoint['throughput_rps']:>8} {endpoint['errors']:>5} "
+              f"{endpoint['p50_ms']:>9} {endpoint['p90_ms']:>9} {endpoint['p99_ms']:>9} {endpoint['max_ms']:>9}")
+    print(f"{'all':<32} {report['requests']:>7} {report['throughput_rps']:>8} {report['errors']:>5} "
+          f"{report['p50_ms']:>9} {report['p90_ms']:>9} {report['p99_ms']:>9} {report['max_ms']:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mixed-scenario load test with per-endpoint latency percentiles")
+    parser.add_argument("--url", help="Base URL of a running server; omit to drive api.main:app in-process")
+    parser.add_argument("--prefix", default="/api/v1")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run")
+    parser.add_argument("--iterations", type=int, default=0, help="Stop after this many scenario runs (0: duration only)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Scenario weights, e.g. browse=60,search=25,login=5,write=10")
+    parser.add_argument("--login-burst", type=int, default=5, help="Concurrent logins per login scenario run")
+    parser.add_argument("--seed-books", type=int, default=200, help="Books created before the run")
+    parser.add_argument("--keep-books", action="store_true", help="Leave the seeded books in the database")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--email", default="loadtest@example.com")
+    parser.add_argument("--password", default="LoadTest123")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.output:
+        with open(args.output, "wb") as handle:
+            handle.write(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Compare MessagePack and JSON for typical book listing responses: payload size, encode and decode time
+Usage: python benchmarks/msgpack_vs_json.py [--rounds 500]
+"""
+
+import argparse
+import gzip
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import msgpack
+import orjson
+
+from api.utils.serialization import dumps, packb, to_json
+
+PAGE_SIZES = (5, 100, 1000)
+
+
+def make_listing(count: int) -> dict:
+    now = datetime.utcnow()
+    books = [
+        to_json({
+            "_id": ObjectId(),
+            "name": f"Book {index}",
+            "author": f"Author {index % 37}",
+            "price": round(5 + index * 0.37, 2),
+            "description": "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 4,
+            "created_at": now - timedelta(days=index),
+            "updated_at": now,
+        })
+        for index in range(count)
+    ]
+    return {"msg": "Ok", "data": books, "totalItems": count, "totalPages": 1, "limit": count, "currentPage": 1}
+
+
+def micros(fn, rounds: int) -> float:
+    return timeit.timeit(fn, number=rounds) / rounds * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MessagePack against JSON")
+    parser.add_argument("--rounds", type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{'books':>6} {'format':>8} {'bytes':>9} {'gzip':>8} {'encode us':>10} {'decode us':>10}")
+    for count in PAGE_SIZES:
+        listing = make_listing(count)
+        rounds = max(1, args.rounds * 100 // max(count, 100))
+        as_json, as_msgpack = dumps(listing), packb(listing)
+        assert msgpack.unpackb(as_msgpack) == orjson.loads(as_json)
+        for name, body, encode, decode in (
+            ("json", as_json, lambda: dumps(listing), lambda: orjson.loads(as_json)),
+            ("msgpack", as_msgpack, lambda: packb(listing), lambda: msgpack.unpackb(as_msgpack)),
+        ):
+            print(
+                f"{count:>6} {name:>8} {len(body):>9} {len(gzip.compress(body)):>8} "
+                f"{micros(encode, rounds):>10.1f} {micros(decode, rounds):>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
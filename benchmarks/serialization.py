@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Compare the JSON paths for a page of books, starting from the BSON batch the driver receives
+Usage: python benchmarks/serialization.py [--books 100] [--rounds 500]
+
+before: decode to dicts, swap _id for id in a loop, jsonable_encoder, then JSONResponse
+orjson: decode to dicts, to_json + FastJSONResponse (no jsonable_encoder)
+raw:    RawBSONDocument batch transcoded straight to JSON bytes (RAW_BSON_READS)
+"""
+
+import argparse
+import gc
+import os
+import sys
+import timeit
+import tracemalloc
+from datetime import datetime, timedelta
+
+import bson
+from bson import ObjectId
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from api.utils.bson_json import RAW_CODEC_OPTIONS, raw_array
+from api.utils.serialization import FastJSONResponse, to_json
+
+
+def make_batch(count: int) -> bytes:
+    now = datetime.utcnow()
+    return b"".join(
+        bson.encode({
+            "_id": ObjectId(),
+            "name": f"Book {index}",
+            "author": f"Author {index % 37}",
+            "price": round(5 + index * 0.37, 2),
+            "description": "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 4,
+            "created_at": now - timedelta(days=index),
+            "updated_at": now,
+        })
+        for index in range(count)
+    )
+
+
+def envelope(data, count: int) -> dict:
+    return {"msg": "Ok", "data": data, "totalItems": count, "limit": count}
+
+
+def before(batch: bytes) -> bytes:
+    books = bson.decode_all(batch)
+    for book in books:
+        book["id"] = str(book["_id"])
+        del book["_id"]
+    return JSONResponse(jsonable_encoder(envelope(books, len(books)))).body
+
+
+def with_orjson(batch: bytes) -> bytes:
+    books = bson.decode_all(batch)
+    for book in books:
+        to_json(book)
+    return FastJSONResponse(envelope(books, len(books))).body
+
+
+def raw(batch: bytes) -> bytes:
+    books = bson.decode_all(batch, RAW_CODEC_OPTIONS)
+    return FastJSONResponse(envelope(raw_array(books), len(books))).body
+
+
+def peak_bytes(fn, batch: bytes) -> int:
+    tracemalloc.start()
+    fn(batch)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark listing serialization")
+    parser.add_argument("--books", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=500)
+    args = parser.parse_args()
+
+    batch = make_batch(args.books)
+    paths = (("before", before), ("orjson", with_orjson), ("raw", raw))
+    assert with_orjson(batch) == raw(batch), "orjson and raw paths must produce the same body"
+
+    print(f"page of {args.books} books, {len(batch)} bytes of BSON")
+    results = {}
+    for name, fn in paths:
+        collections = gc.get_stats()[0]["collections"]
+        # timeit disables the collector; keep it on so the counts mean something
+        results[name] = timeit.timeit(lambda: fn(batch), "gc.enable()", number=args.rounds) / args.rounds * 1e6
+        collections = gc.get_stats()[0]["collections"] - collections
+        print(f"{name:>6}: {results[name]:9.1f} us  peak {peak_bytes(fn, batch) / 1024:8.1f} KiB  gen-0 collections {collections}")
+    for name in ("orjson", "raw"):
+        print(f"{name} speedup: {results['before'] / results[name]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Import books from an NDJSON or CSV vendor feed straight into MongoDB
+Usage: python import_books.py feed.ndjson [--format csv] [--mode upsert] [--chunk-size 500]
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+from api.database import connect_to_mongo, close_mongo_connection, get_book_collection
+from api.utils.catalog_io import (
+    BookImporter, iter_csv_records, iter_lines, iter_ndjson_records
+)
+
+READ_BYTES = 64 * 1024
+
+
+async def read_chunks(path: Path):
+    """Read the feed incrementally so memory does not grow with the file size"""
+    with path.open("rb") as feed:
+        while True:
+            chunk = feed.read(READ_BYTES)
+            if not chunk:
+                break
+            yield chunk
+
+
+async def run_import(path: Path, format: str, mode: str, chunk_size: int) -> int:
+    await connect_to_mongo()
+    try:
+        book_collection = await get_book_collection()
+        lines = iter_lines(read_chunks(path))
+        records = iter_csv_records(lines) if format == "csv" else iter_ndjson_records(lines)
+        importer = BookImporter(book_collection, mode=mode, chunk_size=chunk_size)
+        async for event in importer.run(records):
+            print(json.dumps(event), flush=True)
+        return 1 if importer.failed else 0
+    finally:
+        await close_mongo_connection()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import books from an NDJSON or CSV file")
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--format", choices=["ndjson", "csv"], help="defaults to the file extension")
+    parser.add_argument("--mode", choices=["insert", "upsert"], default="insert",
+                        help="upsert matches existing books on (name, author)")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    args = parser.parse_args()
+
+    format = args.format or ("csv" if args.path.suffix.lower() == ".csv" else "ndjson")
+    sys.exit(asyncio.run(run_import(args.path, format, args.mode, args.chunk_size)))
+
+
+if __name__ == "__main__":
+    main()
@@ -43,6 +43,33 @@ def check_env_file():
     print("✅ .env file found")
     return True
 
+def run_migrations():
+    """Create declared MongoDB indexes, backfill search tokens and report index usage"""
+    import asyncio
+    from api.database import connect_to_mongo, close_mongo_connection, db
+    from api.indexes import ensure_indexes, index_report
+    from api.utils.search import backfill_search_tokens
+
+    async def migrate():
+        await connect_to_mongo()
+        try:
+            created = await ensure_indexes(db.database)
+            backfilled = await backfill_search_tokens(db.database.books)
+            report = await index_report(db.database)
+        finally:
+            await close_mongo_connection()
+        return created, backfilled, report
+
+    print("🗂️  Ensuring MongoDB indexes...")
+    created, backfilled, report = asyncio.run(migrate())
+    print(f"✅ books: search tokens computed for {backfilled} existing books")
+    for collection_name, names in created.items():
+        print(f"✅ {collection_name}: {len(names)} indexes ensured")
+    for collection_name, details in report.items():
+        for kind in ("missing", "unused", "undeclared"):
+            if details[kind]:
+                print(f"⚠️  {collection_name} {kind}: {', '.join(details[kind])}")
+
 def start_server():
     """Start the FastAPI development server"""
     print("🚀 Starting Ultimate Library API...")
@@ -75,6 +102,11 @@ def main():
     if not check_env_file():
         return
     
+    # Migration step: `python start.py --migrate` only manages indexes
+    if "--migrate" in sys.argv:
+        run_migrations()
+        return
+    
     # Start server
     start_server()
 
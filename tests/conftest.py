@@ -0,0 +1,59 @@
+import os
+
+# Settings are read on import; the tests never reach a real server
+os.environ.setdefault("MONGODB_CONNECT_URI", "mongodb://localhost:27017")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+
+import httpx
+import pytest
+from mongomock.collection import BulkOperationBuilder
+from mongomock_motor import AsyncMongoMockClient
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def mongo_client(monkeypatch):
+    # pymongo passes `sort` to bulk update builders; mongomock does not accept it yet
+    for name in ("add_update", "add_replace"):
+        original = getattr(BulkOperationBuilder, name)
+
+        def without_sort(self, *args, sort=None, _original=original, **kwargs):
+            return _original(self, *args, **kwargs)
+
+        monkeypatch.setattr(BulkOperationBuilder, name, without_sort)
+    return AsyncMongoMockClient()
+
+
+@pytest.fixture
+def mongo(mongo_client):
+    """An in-memory database standing in for MongoDB"""
+    return mongo_client["ultimate_library_test"]
+
+
+@pytest.fixture
+async def client(mongo_client, mongo, monkeypatch):
+    """The app called in-process, wired to the in-memory database"""
+    from api import database
+    from api.main import app
+
+    monkeypatch.setattr(database.db, "client", mongo_client)
+    monkeypatch.setattr(database.db, "database", mongo)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+@pytest.fixture
+async def auth_headers(mongo):
+    """A bearer token for an active user stored in the in-memory database"""
+    from api.auth.auth_utils import create_access_token
+
+    await mongo.users.insert_one({
+        "name": "Ada", "lastname": "Lovelace", "email": "ada@example.com",
+        "hashed_password": "unused", "role": "admin", "is_active": True, "is_deleted": False,
+    })
+    return {"Authorization": f"Bearer {create_access_token({'sub': 'ada@example.com'})}"}
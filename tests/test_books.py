@@ -0,0 +1,19 @@
+import pytest
+
+
+@pytest.mark.anyio
+async def test_create_update_and_list(client, auth_headers):
+    response = await client.post("/api/v1/books", json={"name": "Dune", "author": "Herbert", "price": 9.5}, headers=auth_headers)
+    assert response.status_code == 200
+    book = response.json()["data"]
+    assert "search_tokens" not in book
+
+    response = await client.put(f"/api/v1/books/{book['id']}", json={"price": 12, "description": "Desert planet"}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["data"]["price"] == 12
+    assert "search_tokens" not in response.json()["data"]
+
+    response = await client.get("/api/v1/books")
+    assert response.status_code == 200
+    assert [(book["name"], book["price"], book["description"]) for book in response.json()["data"]] == [("Dune", 12, "Desert planet")]
+    assert "search_tokens" not in response.json()["data"][0]
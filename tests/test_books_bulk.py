@@ -0,0 +1,114 @@
+import pytest
+from bson import ObjectId
+from pymongo.errors import ServerSelectionTimeoutError
+
+from api.routers.books import book_cache
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("method, collection_method, body", [
+    ("POST", "insert_many", [{"name": "Dune", "author": "Herbert", "price": 9.5}]),
+    ("PATCH", "bulk_write", [{"id": "65a1b2c3d4e5f60718293a4b", "price": 12}]),
+])
+async def test_failed_writes_still_invalidate_cached_books(client, mongo, auth_headers, monkeypatch, method, collection_method, body):
+    async def fail_part_way(*args, **kwargs):
+        raise ServerSelectionTimeoutError("primary stepped down")
+
+    monkeypatch.setattr(type(mongo.books), collection_method, fail_part_way)
+    generation = book_cache.generation
+    response = await client.request(method, "/api/v1/books/bulk", json=body, headers=auth_headers)
+
+    assert response.status_code == 503
+    assert book_cache.generation > generation
+
+
+@pytest.mark.anyio
+async def test_failed_delete_still_invalidates_cached_books(client, mongo, auth_headers, monkeypatch):
+    result = await mongo.books.insert_one({"name": "Dune", "author": "Herbert", "price": 9.5})
+
+    async def fail_part_way(*args, **kwargs):
+        raise ServerSelectionTimeoutError("primary stepped down")
+
+    monkeypatch.setattr(type(mongo.books), "delete_many", fail_part_way)
+    generation = book_cache.generation
+    response = await client.request("DELETE", "/api/v1/books/bulk", json={"ids": [str(result.inserted_id)]}, headers=auth_headers)
+
+    assert response.status_code == 503
+    assert book_cache.generation > generation
+
+
+@pytest.mark.anyio
+async def test_bulk_create_reports_each_item(client, mongo, auth_headers):
+    await mongo.books.create_index([("name", 1), ("author", 1)], unique=True)
+    response = await client.post("/api/v1/books/bulk", json=[
+        {"name": "Dune", "author": "Herbert", "price": 9.5},
+        {"name": "Emma", "author": "Austen", "price": -1},
+        {"name": "Dune", "author": "Herbert", "price": 11},
+        {"name": "Ulysses", "author": "Joyce", "price": 15, "description": "Dublin"},
+    ], headers=auth_headers)
+
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert (data["succeeded"], data["failed"]) == (2, 2)
+    results = data["results"]
+    assert [result["index"] for result in results] == [0, 1, 2, 3]
+    assert [result["status"] for result in results] == ["created", "error", "error", "created"]
+    assert results[1]["errors"][0]["loc"] == ["price"]
+    assert "E11000" in results[2]["errors"][0]["msg"]
+
+    stored = {book["name"]: book async for book in mongo.books.find()}
+    assert set(stored) == {"Dune", "Ulysses"}
+    assert str(stored["Dune"]["_id"]) == results[0]["id"]
+    assert stored["Ulysses"]["search_tokens"] == ["dublin", "joyce", "ulysses"]
+
+
+@pytest.mark.anyio
+async def test_bulk_update_reports_each_item(client, mongo, auth_headers):
+    result = await mongo.books.insert_one({"name": "Dune", "author": "Herbert", "price": 9.5, "search_tokens": ["dune", "herbert"]})
+    book_id = str(result.inserted_id)
+    response = await client.patch("/api/v1/books/bulk", json=[
+        {"id": book_id, "name": "Dune Messiah"},
+        {"id": "not-an-id", "price": 5},
+        {"id": str(ObjectId()), "price": 5},
+        {"id": book_id, "price": 0},
+        {"id": book_id},
+    ], headers=auth_headers)
+
+    assert response.status_code == 200
+    results = response.json()["data"]["results"]
+    assert [result["status"] for result in results] == ["updated", "error", "error", "error", "error"]
+    assert [result["errors"][0]["msg"] for result in results[1:3]] + [results[4]["errors"][0]["msg"]] == [
+        "Invalid book ID", "Book not found", "No fields to update"
+    ]
+    assert results[3]["errors"][0]["loc"] == ["price"]
+
+    stored = await mongo.books.find_one({"_id": result.inserted_id})
+    assert (stored["name"], stored["price"]) == ("Dune Messiah", 9.5)
+    assert stored["search_tokens"] == ["dune", "herbert", "messiah"]
+
+
+@pytest.mark.anyio
+async def test_bulk_delete_reports_each_item(client, mongo, auth_headers):
+    result = await mongo.books.insert_many([{"name": "Dune"}, {"name": "Emma"}])
+    kept, deleted = result.inserted_ids
+    response = await client.request("DELETE", "/api/v1/books/bulk", json={
+        "ids": [str(deleted), "nope", str(ObjectId())]
+    }, headers=auth_headers)
+
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert (data["succeeded"], data["failed"]) == (1, 2)
+    assert [result["status"] for result in data["results"]] == ["deleted", "error", "error"]
+    assert [result["errors"][0]["msg"] for result in data["results"][1:]] == ["Invalid book ID", "Book not found"]
+    assert [book["_id"] async for book in mongo.books.find()] == [kept]
+
+
+@pytest.mark.anyio
+async def test_bulk_batches_are_bounded(client, auth_headers, monkeypatch):
+    from api.config import settings
+
+    monkeypatch.setattr(settings, "bulk_max_items", 2)
+    response = await client.post("/api/v1/books/bulk", json=[{"name": "Dune", "author": "Herbert", "price": 1}] * 3, headers=auth_headers)
+    assert response.status_code == 400
+    response = await client.post("/api/v1/books/bulk", json=[], headers=auth_headers)
+    assert response.status_code == 400
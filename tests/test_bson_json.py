@@ -0,0 +1,70 @@
+from datetime import datetime
+
+import bson
+import orjson
+import pytest
+from bson import Decimal128, Int64, ObjectId, Regex
+from bson.raw_bson import RawBSONDocument
+
+from api.utils.bson_json import raw_array, raw_document, transcode
+from api.utils.serialization import dumps, to_json
+
+BOOK = {
+    "_id": ObjectId("65a1b2c3d4e5f60718293a4b"),
+    "name": 'Dune "Messiah"\n',
+    "author": "Frank Herbert — é",
+    "price": 9.5,
+    "stock": 3,
+    "sold": Int64(2 ** 40),
+    "rating": 1e16,
+    "discount": Decimal128("1.10"),
+    "published": True,
+    "series": None,
+    "tags": ["sci-fi", 1, {"nested": []}],
+    "meta": {"back\\slash": "v"},
+    "created_at": datetime(2024, 1, 2, 3, 4, 5, 123000),
+    "updated_at": datetime(1960, 1, 1),
+}
+
+
+def decoded_json(document: dict) -> bytes:
+    return dumps(to_json(bson.decode(bson.encode(document))))
+
+
+def transcoded(document: dict, fields=None) -> bytes:
+    out = bytearray()
+    transcode(out, bson.encode(document), fields)
+    return bytes(out)
+
+
+@pytest.mark.parametrize("document", [
+    BOOK,
+    {"_id": "isbn-1", "name": "Dune"},
+    {"name": "Dune", "_id": ObjectId("65a1b2c3d4e5f60718293a4b")},
+    {"_id": ObjectId("65a1b2c3d4e5f60718293a4b")},
+])
+def test_transcoding_matches_the_decoded_path(document):
+    assert transcoded(document) == decoded_json(document)
+
+
+def test_types_without_a_json_form_fall_back_to_decoding():
+    document = {"_id": ObjectId("65a1b2c3d4e5f60718293a4b"), "pattern": Regex("^a", "i")}
+
+    with pytest.raises(TypeError):
+        transcoded(document)
+    assert transcoded({"_id": 7, "name": "Dune"}) == b'{"name":"Dune","id":"7"}'
+
+
+def test_fields_keep_only_the_selected_keys_and_id():
+    assert orjson.loads(transcoded(BOOK, ("name", "price"))) == {
+        "name": BOOK["name"], "price": 9.5, "id": str(BOOK["_id"])
+    }
+
+
+def test_array_and_document_embed_in_a_payload():
+    books = [RawBSONDocument(bson.encode(BOOK)), RawBSONDocument(bson.encode({**BOOK, "_id": ObjectId()}))]
+
+    payload = dumps({"data": raw_array(books)})
+    assert orjson.loads(payload)["data"] == [orjson.loads(decoded_json(bson.decode(book.raw))) for book in books]
+    assert dumps({"data": raw_array([])}) == b'{"data":[]}'
+    assert dumps({"data": raw_document(books[0])}) == b'{"data":' + decoded_json(BOOK) + b"}"
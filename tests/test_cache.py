@@ -0,0 +1,99 @@
+import pytest
+
+from api.utils import cache as cache_module
+from api.utils.cache import MISSING, TTLCache
+
+
+@pytest.fixture
+def cache():
+    return TTLCache("test", max_entries=3, ttl_seconds=30)
+
+
+def test_tag_invalidation_drops_only_tagged_entries(cache):
+    cache.set("book-1", "one", tags=("book:1", "books:list"))
+    cache.set("book-2", "two", tags=("book:2",))
+    cache.set("page-1", ["one"], tags=("books:list",))
+
+    cache.invalidate_tag("books:list")
+
+    assert cache.get("book-1") is MISSING
+    assert cache.get("page-1") is MISSING
+    assert cache.get("book-2") == "two"
+    assert cache.stats()["invalidations"] == 2
+
+
+def test_invalidated_tag_does_not_catch_later_entries(cache):
+    cache.set("book-1", "one", tags=("book:1",))
+    cache.invalidate_tag("book:1")
+    cache.set("book-1", "new", tags=("book:1",))
+    assert cache.get("book-1") == "new"
+
+
+def test_value_read_before_an_invalidation_is_not_stored(cache):
+    generation = cache.generation
+    cache.invalidate_tag("book:1")  # a write lands while the reader is querying
+    cache.set("book-1", "stale", tags=("book:1",), generation=generation)
+    assert cache.get("book-1") is MISSING
+
+    generation = cache.generation
+    cache.set("book-1", "fresh", tags=("book:1",), generation=generation)
+    assert cache.get("book-1") == "fresh"
+
+
+@pytest.mark.parametrize("invalidate", [
+    lambda cache: cache.invalidate("other"),
+    lambda cache: cache.invalidate_tag("other"),
+    lambda cache: cache.clear(),
+])
+def test_every_invalidation_moves_the_generation(cache, invalidate):
+    generation = cache.generation
+    invalidate(cache)
+    assert cache.generation > generation
+
+
+def test_least_recently_used_entry_is_evicted(cache):
+    for key in ("a", "b", "c"):
+        cache.set(key, key)
+    cache.get("a")
+    cache.set("d", "d")
+
+    assert cache.get("b") is MISSING
+    assert [cache.get(key) for key in ("a", "c", "d")] == ["a", "c", "d"]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_evicted_entries_leave_their_tags(cache):
+    for key in ("a", "b", "c", "d"):
+        cache.set(key, key, tags=("books:list",))
+    assert cache._tags["books:list"] == {"b", "c", "d"}
+
+
+def test_entries_expire_after_the_ttl(cache, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache.set("a", "a")
+    now[0] += 29
+    assert cache.get("a") == "a"
+    now[0] += 2
+    assert cache.get("a") is MISSING
+    assert cache.stats()["expirations"] == 1
+
+
+def test_byte_budget_evicts_and_skips_oversized_values():
+    cache = TTLCache("test-bytes", max_entries=100, max_bytes=10, sizeof=len)
+    cache.set("a", "aaaa")
+    cache.set("b", "bbbb")
+    cache.set("c", "cccc")
+    assert cache.get("a") is MISSING
+    assert cache.bytes == 8
+
+    cache.set("big", "x" * 11)
+    assert cache.get("big") is MISSING
+    assert cache.get("b") == "bbbb"
+
+
+def test_disabled_cache_stores_nothing():
+    cache = TTLCache("test-disabled", enabled=False)
+    cache.set("a", "a")
+    assert cache.get("a") is MISSING
+    assert cache.stats()["misses"] == 0
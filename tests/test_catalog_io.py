@@ -0,0 +1,173 @@
+import asyncio
+import csv
+import io
+from datetime import datetime
+
+import orjson
+import pytest
+from starlette.requests import ClientDisconnect, Request
+
+from api.utils.catalog_io import ImportProgressResponse, RequestBody, iter_csv_records, iter_lines
+
+
+def upload(*chunks: bytes, spec_version: str = "2.3"):
+    """An ASGI receive that delivers `chunks` as the body, then reports a disconnect"""
+    messages = [
+        {"type": "http.request", "body": chunk, "more_body": index < len(chunks) - 1}
+        for index, chunk in enumerate(chunks)
+    ]
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        return {"type": "http.disconnect"}
+
+    scope = {"type": "http", "asgi": {"spec_version": spec_version}, "method": "POST", "path": "/", "headers": []}
+    return scope, receive
+
+
+def endless_import(body: RequestBody, stopped: list):
+    async def events():
+        try:
+            async for line in iter_lines(body):
+                yield line.encode() + b"\n"
+            while True:  # batches still being written after the upload
+                await asyncio.sleep(0.01)
+                yield b"progress\n"
+        finally:
+            stopped.append(True)
+    return events()
+
+
+@pytest.mark.anyio
+async def test_import_stops_when_the_client_disconnects():
+    scope, receive = upload(b"first\nsec", b"ond\n")
+    body = RequestBody(Request(scope, receive))
+    stopped, sent = [], []
+
+    async def send(message):
+        sent.append(message)
+
+    await asyncio.wait_for(ImportProgressResponse(endless_import(body, stopped), body)(scope, receive, send), 1)
+
+    assert stopped == [True]
+    chunks = [message.get("body") for message in sent if message["type"] == "http.response.body"]
+    assert chunks[:2] == [b"first\n", b"second\n"]
+
+
+@pytest.mark.anyio
+async def test_import_stops_when_sending_fails_on_asgi_2_4():
+    scope, receive = upload(b"first\n", spec_version="2.4")
+    body = RequestBody(Request(scope, receive))
+    stopped = []
+
+    async def send(message):
+        if message["type"] == "http.response.body" and message["body"] == b"progress\n":
+            raise OSError("connection reset")
+
+    with pytest.raises(ClientDisconnect):
+        await asyncio.wait_for(ImportProgressResponse(endless_import(body, stopped), body)(scope, receive, send), 1)
+    assert stopped == [True]
+
+
+async def collect(iterator):
+    return [item async for item in iterator]
+
+
+async def chunked(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+CSV = 'name,author,price,description\r\n"Cien años, de soledad",García,10,"Línea uno\r\nlínea ""dos"""\r\n\r\nDune,Herbert,9.5,\r\n'.encode()
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("size", [1, 2, 5, 64, len(CSV)])
+async def test_csv_records_span_lines_and_chunks(size):
+    records = await collect(iter_csv_records(iter_lines(chunked(b"\xef\xbb\xbf" + CSV, size))))
+
+    assert records == [
+        (2, {"name": "Cien años, de soledad", "author": "García", "price": "10", "description": 'Línea uno\nlínea "dos"'}),
+        (5, {"name": "Dune", "author": "Herbert", "price": "9.5"}),
+    ]
+
+
+@pytest.mark.anyio
+async def test_csv_record_problems_are_reported_per_record():
+    data = b'name,author\na,b,c\n"' + b"x" * 200_000 + b'",y\nok,fine\n"open,quote\n'
+    records = await collect(iter_csv_records(iter_lines(chunked(data, 4096))))
+
+    assert [(line, str(record)) for line, record in records if isinstance(record, ValueError)] == [
+        (2, "Expected 2 columns, got 3"),
+        (3, "field larger than field limit (131072)"),
+        (5, "Unterminated quoted field"),
+    ]
+    assert (4, {"name": "ok", "author": "fine"}) in records
+
+
+@pytest.mark.anyio
+async def test_ndjson_import_reports_each_bad_line(client, mongo, auth_headers):
+    body = b'{"name": "Dune", "author": "Herbert", "price": 9.5}\n\nnot json\n[1]\n{"name": "Emma", "author": "Austen", "price": 0}\n'
+    response = await client.post("/api/v1/books/import", content=body, headers=auth_headers)
+
+    assert response.status_code == 200
+    events = [orjson.loads(line) for line in response.content.splitlines()]
+    assert [(event["event"], event.get("line")) for event in events] == [
+        ("error", 3), ("error", 4), ("error", 5), ("done", None)
+    ]
+    assert events[-1] == {"event": "done", "processed": 4, "inserted": 1, "updated": 0, "failed": 3}
+    book = await mongo.books.find_one({"name": "Dune"})
+    assert book["search_tokens"] == ["dune", "herbert"]
+
+
+@pytest.mark.anyio
+async def test_upsert_import_keeps_columns_the_file_omits(client, mongo, auth_headers):
+    await mongo.books.insert_one({
+        "name": "Dune", "author": "Herbert", "price": 9.5, "description": "Desert planet",
+        "search_tokens": ["desert", "dune", "herbert", "planet"], "created_at": datetime(2020, 1, 1),
+    })
+    response = await client.post(
+        "/api/v1/books/import", params={"format": "csv", "mode": "upsert"},
+        content=b"name,author,price\nDune,Herbert,12\nEmma,Austen,7\n", headers=auth_headers
+    )
+
+    assert orjson.loads(response.content.splitlines()[-1]) == {
+        "event": "done", "processed": 2, "inserted": 1, "updated": 1, "failed": 0
+    }
+    dune = await mongo.books.find_one({"name": "Dune"})
+    assert (dune["price"], dune["description"], dune["created_at"]) == (12, "Desert planet", datetime(2020, 1, 1))
+    assert dune["search_tokens"] == ["desert", "dune", "herbert", "planet"]
+    emma = await mongo.books.find_one({"name": "Emma"})
+    assert (emma["price"], emma["description"], emma["search_tokens"]) == (7, None, ["austen", "emma"])
+    assert emma["created_at"] == emma["updated_at"]
+
+
+@pytest.mark.anyio
+async def test_export_streams_every_book(client, mongo, auth_headers):
+    created = datetime(2024, 1, 2, 3, 4, 5)
+    result = await mongo.books.insert_many([
+        {"name": "Dune", "author": "Herbert", "price": 9.5, "description": 'Sand, "spice"\nand worms',
+         "search_tokens": ["dune"], "created_at": created, "updated_at": created},
+        {"name": "Emma", "author": "Austen", "price": 7},
+    ])
+    ids = [str(book_id) for book_id in result.inserted_ids]
+
+    response = await client.get("/api/v1/books/export", headers=auth_headers)
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [orjson.loads(line) for line in response.content.splitlines()]
+    assert rows == [
+        {"id": ids[0], "name": "Dune", "author": "Herbert", "price": 9.5, "description": 'Sand, "spice"\nand worms',
+         "created_at": "2024-01-02T03:04:05", "updated_at": "2024-01-02T03:04:05"},
+        {"id": ids[1], "name": "Emma", "author": "Austen", "price": 7, "description": None,
+         "created_at": None, "updated_at": None},
+    ]
+
+    response = await client.get("/api/v1/books/export", params={"format": "csv"}, headers=auth_headers)
+    assert response.headers["content-type"] == "text/csv; charset=utf-8"
+    assert 'filename="books.csv"' in response.headers["content-disposition"]
+    records = list(csv.DictReader(io.StringIO(response.text)))
+    assert [(record["id"], record["name"], record["description"], record["created_at"]) for record in records] == [
+        (ids[0], "Dune", 'Sand, "spice"\nand worms', "2024-01-02T03:04:05"),
+        (ids[1], "Emma", "", ""),
+    ]
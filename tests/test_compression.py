@@ -0,0 +1,141 @@
+import gzip
+import zlib
+
+import anyio
+import brotli
+import httpx
+import pytest
+import zstandard
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from api.middleware.compression import CompressionMiddleware, negotiate
+
+BIG = {"books": [{"name": f"Book {index}", "author": "Author"} for index in range(200)]}
+CHUNKS = [b'{"event":"progress","processed":%d}\n' % index * 20 for index in range(3)]
+
+
+async def big(request):
+    return JSONResponse(BIG)
+
+
+async def small(request):
+    return JSONResponse({"msg": "Ok"})
+
+
+async def image(request):
+    return Response(b"\x89PNG" + b"\0" * 4096, media_type="image/png")
+
+
+async def stream(request):
+    async def chunks():
+        for chunk in CHUNKS:
+            yield chunk
+    return StreamingResponse(chunks(), media_type="application/x-ndjson")
+
+
+app = CompressionMiddleware(
+    Starlette(routes=[Route("/big", big), Route("/small", small), Route("/image", image), Route("/stream", stream)]),
+    minimum_size=1024,
+)
+
+DECODERS = {
+    "gzip": gzip.decompress,
+    "br": brotli.decompress,
+    "zstd": lambda body: zstandard.ZstdDecompressor().decompressobj().decompress(body),
+}
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("gzip, br, zstd", "zstd"),
+    ("gzip;q=1.0, br;q=0.8", "gzip"),
+    ("zstd;q=0.5, br;q=0.9, gzip;q=0.9", "br"),
+    ("*", "zstd"),
+    ("*;q=0.5, gzip", "gzip"),
+    ("zstd;q=0, br;q=0, *;q=0.1", "gzip"),
+    ("identity", None),
+    ("gzip;q=0", None),
+    ("GZIP", "gzip"),
+    ("gzip;q=oops, br", "br"),
+    ("", None),
+])
+def test_negotiate(accept_encoding, expected):
+    assert negotiate(accept_encoding, ["zstd", "br", "gzip"]) == expected
+
+
+def test_negotiate_only_offers_available_encodings():
+    assert negotiate("zstd, br", ["gzip"]) is None
+
+
+@pytest.fixture
+async def middleware_client():
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("encoding", ["gzip", "br", "zstd"])
+async def test_large_body_is_compressed(middleware_client, encoding):
+    async with middleware_client.stream("GET", "/big", headers={"Accept-Encoding": encoding}) as response:
+        compressed = b"".join([chunk async for chunk in response.aiter_raw()])
+    assert response.headers["content-encoding"] == encoding
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert int(response.headers["content-length"]) == len(compressed)
+    assert DECODERS[encoding](compressed) == JSONResponse(BIG).body
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("path, headers", [
+    ("/small", {"Accept-Encoding": "gzip"}),
+    ("/image", {"Accept-Encoding": "gzip"}),
+    ("/big", {"Accept-Encoding": "identity"}),
+])
+async def test_response_passes_through(middleware_client, path, headers):
+    response = await middleware_client.get(path, headers=headers)
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+
+
+async def _call(path: str, accept_encoding: str) -> list:
+    messages = []
+    requested = []
+
+    async def receive():
+        if requested:
+            await anyio.sleep_forever()  # the client stays connected
+        requested.append(True)
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http", "method": "GET", "path": path, "raw_path": path.encode(), "root_path": "",
+        "scheme": "http", "query_string": b"", "server": ("test", 80), "client": ("test", 1234),
+        "http_version": "1.1", "headers": [(b"accept-encoding", accept_encoding.encode())],
+    }
+    await app(scope, receive, send)
+    return messages
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("encoding", ["gzip", "br", "zstd"])
+async def test_stream_is_compressed_chunk_by_chunk(encoding):
+    messages = await _call("/stream", encoding)
+    start, *bodies = messages
+    headers = dict(start["headers"])
+    assert headers[b"content-encoding"] == encoding.encode()
+    assert b"content-length" not in headers
+
+    # Every chunk decodes on arrival, without waiting for the end of the stream
+    decoder = {
+        "gzip": lambda: zlib.decompressobj(31),
+        "br": lambda: brotli.Decompressor(),
+        "zstd": lambda: zstandard.ZstdDecompressor().decompressobj(),
+    }[encoding]()
+    decode = decoder.process if encoding == "br" else decoder.decompress
+    received = [decode(message["body"]) for message in bodies if message["body"]]
+    assert received[:len(CHUNKS)] == CHUNKS
+    assert b"".join(received) == b"".join(CHUNKS)
+    assert bodies[-1]["more_body"] is False
@@ -0,0 +1,87 @@
+import time
+
+import httpx
+import pytest
+from bson import ObjectId
+from pymongo.errors import ExecutionTimeout, OperationFailure, ServerSelectionTimeoutError, WaitQueueTimeoutError
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from api.middleware.deadline import DeadlineMiddleware
+from api.utils.deadline import remaining_seconds, request_deadline, server_error
+
+
+async def budget(request):
+    return JSONResponse({"remaining": remaining_seconds()})
+
+
+@pytest.fixture
+async def deadline_client():
+    app = DeadlineMiddleware(
+        Starlette(routes=[Route("/budget", budget), Route("/exempt", budget)]),
+        timeout_ms=1000,
+        exempt_paths=("/exempt",),
+    )
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+async def remaining(client, path="/budget", **headers):
+    response = await client.get(path, headers=headers)
+    return response.json()["remaining"]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("header, low, high", [
+    (None, 0.9, 1.0),
+    ("250", 0.15, 0.25),
+    ("60000", 0.9, 1.0),
+    ("0", -1.0, 0.001),
+    ("-5", -1.0, 0.001),
+    ("soon", 0.9, 1.0),
+])
+async def test_clients_may_only_shorten_the_budget(deadline_client, header, low, high):
+    headers = {} if header is None else {"X-Request-Timeout-Ms": header}
+    assert low <= await remaining(deadline_client, **headers) <= high
+
+
+@pytest.mark.anyio
+async def test_exempt_paths_run_without_a_deadline(deadline_client):
+    assert await remaining(deadline_client, "/exempt") is None
+    assert remaining_seconds() is None
+
+
+@pytest.mark.parametrize("error, status_code", [
+    (ExecutionTimeout("operation exceeded time limit", 50), 504),
+    (ServerSelectionTimeoutError("no servers found"), 503),
+    (WaitQueueTimeoutError("pool exhausted"), 503),
+    (OperationFailure("bad query", 2), 500),
+    (ValueError("boom"), 500),
+])
+def test_server_error_status(error, status_code):
+    assert server_error(error).status_code == status_code
+
+
+def test_driver_timeouts_after_the_deadline_are_504():
+    with request_deadline(0.001):
+        time.sleep(0.002)
+        assert server_error(ServerSelectionTimeoutError("no servers found")).status_code == 504
+        assert server_error(WaitQueueTimeoutError("pool exhausted")).status_code == 504
+    assert server_error(ServerSelectionTimeoutError("no servers found")).status_code == 503
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("error, status_code, detail", [
+    (ExecutionTimeout("operation exceeded time limit", 50), 504, "Request deadline exceeded"),
+    (ServerSelectionTimeoutError("no servers found"), 503, "Database unavailable"),
+])
+async def test_book_read_failures(client, mongo, monkeypatch, error, status_code, detail):
+    async def failing_find_one(*args, **kwargs):
+        raise error
+
+    monkeypatch.setattr(type(mongo.books), "find_one", failing_find_one)
+    response = await client.get(f"/api/v1/books/{ObjectId()}")
+
+    assert response.status_code == status_code
+    assert response.json()["detail"] == detail
@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from api.utils.etag import compute_etag, etag_matches
+
+ETAG = 'W/"0123abcd"'
+
+
+@pytest.mark.parametrize("if_none_match", [
+    'W/"0123abcd"',
+    '"0123abcd"',
+    '"ffff", W/"0123abcd"',
+    ' W/"0123abcd" ',
+    "*",
+])
+def test_if_none_match_uses_weak_comparison(if_none_match):
+    assert etag_matches(if_none_match, ETAG)
+    assert etag_matches(if_none_match, '"0123abcd"')
+
+
+@pytest.mark.parametrize("if_none_match", [None, "", '"0123abcde"', 'W/"ffff"', "0123abcd"])
+def test_other_validators_do_not_match(if_none_match):
+    assert not etag_matches(if_none_match, ETAG)
+
+
+def test_etag_follows_document_versions():
+    now = datetime(2024, 1, 1)
+    book = {"_id": "1", "name": "Dune", "updated_at": now}
+    etag = compute_etag([book], 1, None)
+
+    assert etag.startswith('W/"')
+    assert compute_etag([dict(book)], 1, None) == etag
+    assert compute_etag([{**book, "updated_at": now + timedelta(seconds=1)}], 1, None) != etag
+    assert compute_etag([book], 2, None) != etag
+
+
+def test_etag_of_sparse_documents_follows_their_content():
+    assert compute_etag([{"_id": "1", "price": 5}]) != compute_etag([{"_id": "1", "price": 6}])
+
+
+@pytest.mark.anyio
+async def test_book_revalidation(client, mongo):
+    result = await mongo.books.insert_one({"name": "Dune", "author": "Herbert", "price": 9.5, "updated_at": datetime(2024, 1, 1)})
+    url = f"/api/v1/books/{result.inserted_id}"
+
+    response = await client.get(url)
+    etag = response.headers["etag"]
+    assert response.status_code == 200
+
+    response = await client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+
+    await mongo.books.update_one({"_id": result.inserted_id}, {"$set": {"price": 12, "updated_at": datetime(2024, 1, 2)}})
+    response = await client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.json()["data"]["price"] == 12
@@ -0,0 +1,57 @@
+from datetime import datetime
+
+import msgpack
+import pytest
+
+from api.utils.negotiation import JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, negotiate_media_type
+
+
+@pytest.mark.parametrize("accept", [
+    "application/msgpack",
+    "application/x-msgpack",
+    "application/msgpack, application/json",
+    "application/json;q=0.5, application/msgpack",
+    "application/msgpack;q=0.8, application/json;q=0.8",
+    "application/x-msgpack;q=0.9, */*;q=0.1",
+    "APPLICATION/MSGPACK",
+])
+def test_msgpack_when_weighted_at_least_as_high_as_json(accept):
+    assert negotiate_media_type(accept) == MSGPACK_MEDIA_TYPE
+
+
+@pytest.mark.parametrize("accept", [
+    "",
+    "*/*",
+    "application/json",
+    "application/msgpack;q=0.5, application/json",
+    "application/msgpack;q=0.5, */*",
+    "application/msgpack;q=0.5, application/*",
+    "application/msgpack;q=0",
+    "application/msgpack;q=oops",
+    "text/html, application/xhtml+xml",
+])
+def test_json_otherwise(accept):
+    assert negotiate_media_type(accept) == JSON_MEDIA_TYPE
+
+
+@pytest.mark.anyio
+async def test_book_is_served_in_the_negotiated_encoding(client, mongo):
+    result = await mongo.books.insert_one({"name": "Dune", "author": "Herbert", "price": 9.5, "updated_at": datetime(2024, 1, 1)})
+    url = f"/api/v1/books/{result.inserted_id}"
+
+    as_json = await client.get(url)
+    as_msgpack = await client.get(url, headers={"Accept": "application/json;q=0.5, application/msgpack"})
+
+    assert as_json.headers["content-type"].startswith(JSON_MEDIA_TYPE)
+    assert as_msgpack.headers["content-type"].startswith(MSGPACK_MEDIA_TYPE)
+    assert "accept" in as_msgpack.headers["vary"].lower()
+    assert as_msgpack.headers["etag"] != as_json.headers["etag"]
+    assert msgpack.unpackb(as_msgpack.content, raw=False)["data"]["name"] == as_json.json()["data"]["name"] == "Dune"
+
+
+@pytest.mark.anyio
+async def test_errors_stay_json(client):
+    response = await client.get("/api/v1/books/0123456789abcdef01234567", headers={"Accept": "application/msgpack"})
+
+    assert response.status_code == 404
+    assert response.headers["content-type"].startswith(JSON_MEDIA_TYPE)
@@ -0,0 +1,83 @@
+import base64
+
+import pytest
+from bson import ObjectId
+
+from api.utils.pagination import (
+    CursorError, decode_cursor, encode_cursor, fetch_page, keyset_filter, sort_spec
+)
+
+PRICES = [3, None, 1, None, 2, 2, 5]
+
+
+def test_cursor_round_trip():
+    book_id = ObjectId()
+    cursor = encode_cursor("price", "asc", {"_id": book_id, "price": 9.5})
+    assert decode_cursor(cursor, "price", "asc") == (9.5, book_id)
+
+
+def test_cursor_keeps_null_values():
+    book_id = ObjectId()
+    cursor = encode_cursor("price", "desc", {"_id": book_id})
+    assert decode_cursor(cursor, "price", "desc") == (None, book_id)
+
+
+def test_cursor_is_bound_to_its_ordering():
+    cursor = encode_cursor("price", "asc", {"_id": ObjectId(), "price": 1})
+    with pytest.raises(CursorError):
+        decode_cursor(cursor, "price", "desc")
+    with pytest.raises(CursorError):
+        decode_cursor(cursor, "name", "asc")
+
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor",
+    base64.urlsafe_b64encode(b"[1, 2]").decode(),
+    base64.urlsafe_b64encode(b'{"o": "price", "s": "asc", "v": 1, "i": "abc"}').decode(),
+])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(CursorError):
+        decode_cursor(cursor, "price", "asc")
+
+
+def test_null_seek_ascending_moves_on_to_values():
+    last_id = ObjectId()
+    assert keyset_filter("price", "asc", None, last_id) == {"$or": [
+        {"price": {"$ne": None}},
+        {"price": None, "_id": {"$gt": last_id}},
+    ]}
+
+
+def test_null_seek_descending_stays_among_nulls():
+    last_id = ObjectId()
+    assert keyset_filter("price", "desc", None, last_id) == {"price": None, "_id": {"$lt": last_id}}
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("sort_by", ["asc", "desc"])
+@pytest.mark.parametrize("limit", [1, 2, 3])
+async def test_cursor_walk_visits_every_document_once(mongo, sort_by, limit):
+    # Nulls and missing fields sort before every value; pages must cross that boundary
+    await mongo.books.insert_many([{"price": price} for price in PRICES] + [{}])
+    expected = [book["_id"] for book in await mongo.books.find({}).sort(sort_spec("price", sort_by)).to_list(None)]
+
+    seen, cursor = [], ""
+    while cursor is not None:
+        page, cursor, total = await fetch_page(
+            mongo.books, {}, "price", sort_by, limit, cursor=cursor, include_total=False
+        )
+        assert total is None
+        seen += [book["_id"] for book in page]
+    assert seen == expected
+
+
+@pytest.mark.anyio
+async def test_cursor_walk_keeps_the_listing_filter(mongo):
+    await mongo.books.insert_many([{"price": price, "author": "a" if index % 2 else "b"} for index, price in enumerate(PRICES)])
+
+    seen, cursor = [], ""
+    while cursor is not None:
+        page, cursor, total = await fetch_page(mongo.books, {"author": "a"}, "price", "asc", 1, cursor=cursor)
+        assert total == 3
+        seen += [book["price"] for book in page]
+    assert seen == [None, None, 2]
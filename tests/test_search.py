@@ -0,0 +1,55 @@
+import pytest
+
+from api.utils.search import backfill_search_tokens, prefix_query, search_tokens, tokenize
+
+
+def test_tokens_are_lowercase_without_accents():
+    assert tokenize("García Márquez, Cien años") == ["garcia", "marquez", "cien", "anos"]
+
+
+def test_search_tokens_cover_every_searchable_field_once():
+    book = {"name": "Dune Messiah", "author": "Frank Herbert", "description": "Dune, again", "price": 9.5}
+    assert search_tokens(book) == ["again", "dune", "frank", "herbert", "messiah"]
+    assert search_tokens({"name": "Dune", "description": None}) == ["dune"]
+
+
+def test_prefix_query_anchors_every_term():
+    assert list(prefix_query("gar")) == ["search_tokens"]
+    assert prefix_query("gar")["search_tokens"].pattern == "^gar"
+    assert [clause["search_tokens"].pattern for clause in prefix_query("Cien Añ")["$and"]] == ["^cien", "^an"]
+    assert prefix_query("  ,, ") == {"_id": {"$exists": False}}
+
+
+@pytest.mark.anyio
+async def test_prefix_search_matches_word_starts(client, mongo, auth_headers):
+    for name, author in [("Cien años de soledad", "Gabriel García Márquez"), ("Dune", "Frank Herbert"), ("Sugar", "Anon")]:
+        response = await client.post("/api/v1/books", json={"name": name, "author": author, "price": 10}, headers=auth_headers)
+        assert response.status_code == 200
+
+    async def names(keyword):
+        response = await client.get("/api/v1/books", params={"keyword": keyword, "search_mode": "prefix", "limit": 10})
+        assert response.status_code == 200
+        return sorted(book["name"] for book in response.json()["data"])
+
+    assert await names("gar") == ["Cien años de soledad"]
+    assert await names("GARCIA sol") == ["Cien años de soledad"]
+    assert await names("her") == ["Dune"]
+    assert await names("ugar") == []
+
+
+@pytest.mark.anyio
+async def test_backfill_only_touches_books_without_tokens(mongo):
+    await mongo.books.insert_many([
+        {"name": "Dune", "author": "Frank Herbert"},
+        {"name": "Emma", "author": "Jane Austen", "description": "Matchmaking"},
+        {"name": "Kept", "author": "Someone", "search_tokens": ["kept"]},
+    ])
+
+    assert await backfill_search_tokens(mongo.books, batch_size=1) == 2
+    tokens = {book["name"]: book["search_tokens"] async for book in mongo.books.find()}
+    assert tokens == {
+        "Dune": ["dune", "frank", "herbert"],
+        "Emma": ["austen", "emma", "jane", "matchmaking"],
+        "Kept": ["kept"],
+    }
+    assert await backfill_search_tokens(mongo.books) == 0